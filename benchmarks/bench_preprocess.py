@@ -0,0 +1,108 @@
+"""Compare preprocessing stage timings per denoiser against the pre-engine path.
+
+Usage::
+
+    PYTHONPATH=src python benchmarks/bench_preprocess.py [image] [--size 2048] [--repeat 5]
+
+Without an image a synthetic photo-like frame is generated. The ``legacy`` row
+reproduces the former split/merge path including the second BGR->LAB conversion
+that segmentation used to do; engine rows report the engine's own stage timings.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from imagetosvg.config import DENOISERS, PipelineConfig
+from imagetosvg.io import read_image
+from imagetosvg.preprocess import SHARPEN_KERNEL, PreprocessEngine
+
+
+def synthetic_image(size: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:size, 0:size].astype(np.float32) / size
+    image = np.dstack([xx * 200 + 30, yy * 180 + 40, (1 - xx) * 160 + 60])
+    for _ in range(40):
+        cx, cy = rng.integers(0, size, 2).tolist()
+        radius = int(rng.integers(size // 40, size // 8))
+        color = rng.integers(0, 255, 3).tolist()
+        cv2.circle(image, (cx, cy), radius, color, -1)
+    noise = rng.normal(0, 12, image.shape)
+    return np.clip(image + noise, 0, 255).astype(np.uint8)
+
+
+def legacy_preprocess(bgr: np.ndarray, config: PipelineConfig) -> dict[str, float]:
+    timings: dict[str, float] = {}
+    started = time.perf_counter()
+    sigma = float(config.denoise_sigma)
+    denoised = cv2.bilateralFilter(bgr, d=9, sigmaColor=sigma, sigmaSpace=sigma)
+    timings["denoise"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    l, a, b = cv2.split(cv2.cvtColor(denoised, cv2.COLOR_BGR2LAB))
+    l_norm = cv2.createCLAHE(clipLimit=2.4, tileGridSize=(8, 8)).apply(l)
+    enhanced = cv2.cvtColor(cv2.merge([l_norm, a, b]), cv2.COLOR_LAB2BGR)
+    sharpened = cv2.filter2D(enhanced, -1, SHARPEN_KERNEL)
+    timings["contrast"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    gray = cv2.cvtColor(sharpened, cv2.COLOR_BGR2GRAY)
+    cv2.cvtColor(sharpened, cv2.COLOR_BGR2LAB)  # segmentation's own conversion
+    timings["color"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    edges = cv2.Canny(gray, threshold1=config.canny_low, threshold2=config.canny_high)
+    if config.edge_dilate_iterations > 0:
+        cv2.dilate(edges, np.ones((2, 2), np.uint8), iterations=config.edge_dilate_iterations)
+    cv2.adaptiveThreshold(
+        gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, config.adaptive_block_size, config.adaptive_c
+    )
+    timings["edges"] = time.perf_counter() - started
+    return timings
+
+
+def _best(runs: list[dict[str, float]]) -> dict[str, float]:
+    return {stage: min(run.get(stage, 0.0) for run in runs) for stage in runs[0]}
+
+
+def _print_row(name: str, timings: dict[str, float]) -> None:
+    stages = " ".join(f"{stage}={value * 1000:8.1f}ms" for stage, value in timings.items())
+    print(f"{name:<18} {stages} total={sum(timings.values()) * 1000:8.1f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("image", type=Path, nargs="?", help="Image to benchmark (default: synthetic)")
+    parser.add_argument("--size", type=int, default=2048, help="Side length of the synthetic image")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    image = read_image(args.image)[:, :, :3].copy() if args.image else synthetic_image(args.size)
+    print(f"image {image.shape[1]}x{image.shape[0]}, best of {args.repeat}")
+
+    config = PipelineConfig().validated()
+    _print_row("legacy", _best([legacy_preprocess(image, config) for _ in range(args.repeat)]))
+
+    for denoiser in DENOISERS:
+        config = PipelineConfig(denoiser=denoiser).validated()
+        # A fresh array per run defeats the source cache, so every stage is measured. The
+        # shared engine mirrors a batch compute worker, which reuses its scratch buffers
+        # across images; the fresh rows allocate them on every run.
+        engine = PreprocessEngine()
+        _print_row(f"engine/{denoiser}", _best([engine.run(image.copy(), config).timings for _ in range(args.repeat)]))
+        fresh = [PreprocessEngine().run(image.copy(), config).timings for _ in range(args.repeat)]
+        _print_row(f"fresh/{denoiser}", _best(fresh))
+
+    config = PipelineConfig().validated()
+    engine = PreprocessEngine()
+    engine.run(image, config)
+    _print_row("engine/cached", _best([engine.run(image, config).timings for _ in range(args.repeat)]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from .config import DetailPreset
+from .segmentation import SegmentationResult
+
+ARTIFACT_SUFFIX = ".artifacts.npz"
+
+
+@dataclass(slots=True)
+class PipelineArtifacts:
+    """Intermediates of one vectorization run, enough to re-run tracing and SVG export."""
+
+    source: Path
+    enhanced: np.ndarray
+    edges: np.ndarray
+    detail_map: np.ndarray
+    segmented: SegmentationResult
+    # Trace settings the SVG was made with; None for artifacts saved before they were recorded.
+    detail: DetailPreset | None = None
+    simplification: float | None = None
+
+    @property
+    def size(self) -> tuple[int, int]:
+        return self.edges.shape[1], self.edges.shape[0]
+
+
+def artifact_path_for(svg_path: Path) -> Path:
+    return svg_path.with_name(f"{svg_path.stem}{ARTIFACT_SUFFIX}")
+
+
+def save_artifacts(path: Path, artifacts: PipelineArtifacts) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    settings = {}
+    if artifacts.detail is not None:
+        settings["detail"] = np.array(artifacts.detail.value)
+    if artifacts.simplification is not None:
+        settings["simplification"] = np.array(artifacts.simplification, dtype=np.float64)
+    with path.open("wb") as fh:
+        np.savez_compressed(
+            fh,
+            source=np.array(str(artifacts.source)),
+            enhanced=artifacts.enhanced,
+            edges=artifacts.edges,
+            detail_map=artifacts.detail_map,
+            labels=artifacts.segmented.labels,
+            palette=artifacts.segmented.palette,
+            **settings,
+        )
+
+
+def load_artifacts(path: Path) -> PipelineArtifacts:
+    if not path.is_file():
+        raise FileNotFoundError(f"Artifact file not found: {path}")
+
+    with np.load(path, allow_pickle=False) as data:
+        labels = data["labels"]
+        palette = data["palette"]
+        segmented = SegmentationResult(palette=palette, labels=labels)
+        return PipelineArtifacts(
+            source=Path(str(data["source"])),
+            enhanced=data["enhanced"],
+            edges=data["edges"],
+            detail_map=data["detail_map"],
+            segmented=segmented,
+            detail=DetailPreset(str(data["detail"])) if "detail" in data.files else None,
+            simplification=float(data["simplification"]) if "simplification" in data.files else None,
+        )
+
+
+def collect_artifacts(input_path: Path) -> list[Path]:
+    if input_path.is_file():
+        return [input_path]
+    if not input_path.exists():
+        raise FileNotFoundError(f"Input path not found: {input_path}")
+    files = sorted(input_path.rglob(f"*{ARTIFACT_SUFFIX}"))
+    if not files:
+        raise FileNotFoundError(f"No artifact files found in {input_path}")
+    return files
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import queue
+import threading
+from pathlib import Path
+from typing import Callable, Generic, TypeVar
+
+import numpy as np
+
+from .io import read_image
+
+T = TypeVar("T")
+
+_DONE = object()
+_MISSING = object()
+_POLL_SECONDS = 0.1
+
+
+class StagedBatchRunner(Generic[T]):
+    """Overlap decoding, compute and writing with bounded queues between the stages.
+
+    One reader thread decodes images into a prefetch queue, ``workers`` compute
+    threads turn them into results, and one writer thread persists results as
+    they arrive. Queue depths bound how many decoded images and pending outputs
+    are held in memory at once. With ``summarize``, ``run`` keeps only each
+    result's summary; the full result reaches the writer and is then released.
+    """
+
+    def __init__(
+        self,
+        process: Callable[[Path, np.ndarray], T],
+        write: Callable[[Path, T], None],
+        prefetch_depth: int = 2,
+        write_queue_depth: int = 4,
+        workers: int = 1,
+        read: Callable[[Path], np.ndarray] = read_image,
+        summarize: Callable[[T], object] | None = None,
+    ):
+        self.process = process
+        self.read = read
+        self.write = write
+        self.summarize = summarize
+        self.prefetch_depth = max(1, prefetch_depth)
+        self.write_queue_depth = max(1, write_queue_depth)
+        self.workers = max(1, workers)
+
+    def run(self, paths: list[Path]) -> list:
+        decoded: queue.Queue = queue.Queue(maxsize=self.prefetch_depth)
+        pending: queue.Queue = queue.Queue(maxsize=self.write_queue_depth)
+        stop = threading.Event()
+        errors: list[BaseException] = []
+        results: list = [_MISSING] * len(paths)
+
+        def fail(exc: BaseException) -> None:
+            errors.append(exc)
+            stop.set()
+
+        def reader() -> None:
+            try:
+                for index, path in enumerate(paths):
+                    if stop.is_set():
+                        return
+                    if not _put(decoded, (index, path, self.read(path)), stop):
+                        return
+            except BaseException as exc:
+                fail(exc)
+            finally:
+                for _ in range(self.workers):
+                    _put(decoded, _DONE, stop)
+
+        def compute() -> None:
+            while True:
+                item = _get(decoded, stop)
+                if item is None or item is _DONE:
+                    return
+                index, path, image = item
+                try:
+                    result = self.process(path, image)
+                except BaseException as exc:
+                    fail(exc)
+                    return
+                del image
+                results[index] = result if self.summarize is None else self.summarize(result)
+                if not _put(pending, (path, result), stop):
+                    return
+                del result
+
+        def writer() -> None:
+            while True:
+                item = _get(pending, stop)
+                if item is None or item is _DONE:
+                    return
+                try:
+                    self.write(*item)
+                except BaseException as exc:
+                    fail(exc)
+                    return
+
+        read_thread = threading.Thread(target=reader, name="imagetosvg-read", daemon=True)
+        write_thread = threading.Thread(target=writer, name="imagetosvg-write", daemon=True)
+        compute_threads = [
+            threading.Thread(target=compute, name=f"imagetosvg-compute-{i}", daemon=True) for i in range(self.workers)
+        ]
+
+        read_thread.start()
+        write_thread.start()
+        for thread in compute_threads:
+            thread.start()
+        for thread in compute_threads:
+            thread.join()
+        _put(pending, _DONE, stop)
+        write_thread.join()
+        stop.set()
+        read_thread.join()
+
+        if errors:
+            raise errors[0]
+        missing = [path for path, res in zip(paths, results) if res is _MISSING]
+        if missing:
+            raise RuntimeError(f"Batch stopped without a result for {len(missing)} image(s), first: {missing[0]}")
+        return results
+
+
+def _put(q: queue.Queue, item: object, stop: threading.Event) -> bool:
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=_POLL_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q: queue.Queue, stop: threading.Event) -> object | None:
+    while not stop.is_set():
+        try:
+            return q.get(timeout=_POLL_SECONDS)
+        except queue.Empty:
+            continue
+    return None
@@ -2,35 +2,171 @@ from __future__ import annotations
 
 import argparse
 import logging
+import sys
 from pathlib import Path
 
-from .config import DetailPreset, PipelineConfig
+from .artifacts import collect_artifacts
+from .config import DENOISERS, DetailPreset, PipelineConfig
+from .io import collect_inputs
 from .pipeline import VectorizationPipeline
+from .scheduler import predicted_makespan
+from .svg_builder import ShapeReusePlan
 
 
 def build_parser() -> argparse.ArgumentParser:
-    parser = argparse.ArgumentParser(description="High-fidelity raster to layered SVG vectorizer")
+    parser = argparse.ArgumentParser(
+        description="High-fidelity raster to layered SVG vectorizer",
+        epilog=(
+            "Use 'retrace <artifacts>' to re-export from stored intermediates, "
+            "'sequence <animation|frame-dir>' for frame sequences."
+        ),
+    )
     parser.add_argument("input", type=Path, help="Input image file or directory")
     parser.add_argument("--output-dir", type=Path, default=Path("output"), help="Directory for SVG files")
     parser.add_argument("--detail", choices=[d.value for d in DetailPreset], default=DetailPreset.HIGH.value)
     parser.add_argument("--no-validate", action="store_true", help="Disable similarity validation")
     parser.add_argument("--no-auto-iterate", action="store_true", help="Disable parameter auto-iteration")
-    parser.add_argument("--min-region-area", type=int, default=20)
     parser.add_argument("--max-colors", type=int, help="Override selected detail preset color count")
     parser.add_argument("--disable-slic", action="store_true", help="Use KMeans-only segmentation")
+    parser.add_argument(
+        "--denoiser",
+        choices=DENOISERS,
+        default="bilateral",
+        help="Preprocessing denoiser; 'guided' and 'bilateral_lowres' are faster on large images",
+    )
+    parser.add_argument(
+        "--shared-palette",
+        action="store_true",
+        help="Learn one palette from a sample of the batch and reuse it for every image",
+    )
+    parser.add_argument(
+        "--palette",
+        type=Path,
+        help="Shared palette JSON (#rrggbb list); loaded if it exists, otherwise learned and saved (implies --shared-palette)",
+    )
+    parser.add_argument(
+        "--save-intermediates",
+        action="store_true",
+        help="Store preprocessing/segmentation intermediates next to each SVG for 'retrace'",
+    )
+    parser.add_argument(
+        "--memory-lean",
+        action="store_true",
+        help="Lower peak memory: compact label arrays, sampled KMeans, memory-mapped BMP input",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Number of parallel compute workers")
+    parser.add_argument("--prefetch-depth", type=int, default=2, help="Decoded images buffered ahead of compute")
+    parser.add_argument("--write-queue-depth", type=int, default=4, help="Finished SVGs buffered ahead of the writer")
+    parser.add_argument("--no-schedule", action="store_true", help="Process batch inputs in path order")
+    parser.add_argument("--cost-model", type=Path, help="Cost model file (default: <output-dir>/.imagetosvg_costs.json)")
+    parser.add_argument("--show-schedule", action="store_true", help="Print the planned batch order and exit")
+    _add_trace_arguments(parser)
     parser.add_argument("--debug", action="store_true", help="Enable debug logging")
     return parser
 
 
-def main() -> None:
-    parser = build_parser()
-    args = parser.parse_args()
+def build_retrace_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="imagetosvg retrace",
+        description="Re-run tracing and SVG export from stored intermediates",
+    )
+    parser.add_argument("input", type=Path, help="Artifact file (*.artifacts.npz) or directory")
+    parser.add_argument("--output-dir", type=Path, default=Path("output"), help="Directory for SVG files")
+    parser.add_argument("--output", type=Path, help="Output SVG path (single artifact file only)")
+    parser.add_argument(
+        "--detail",
+        choices=[d.value for d in DetailPreset],
+        help="Detail preset (default: the preset recorded with the artifacts, else high)",
+    )
+    _add_trace_arguments(parser)
+    parser.add_argument("--debug", action="store_true", help="Enable debug logging")
+    return parser
 
+
+def build_sequence_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="imagetosvg sequence",
+        description="Temporal-coherent vectorization of animated GIF/WebP files or numbered frame directories",
+    )
+    parser.add_argument("input", type=Path, help="Animated image file or directory of numbered frames")
+    parser.add_argument("--output-dir", type=Path, default=Path("output"), help="Directory for SVG files")
+    parser.add_argument("--detail", choices=[d.value for d in DetailPreset], default=DetailPreset.HIGH.value)
+    parser.add_argument("--animated", action="store_true", help="Write one animated SVG instead of one SVG per frame")
+    parser.add_argument("--frame-duration", type=int, default=100, help="Frame duration in ms when the input has none")
+    parser.add_argument("--block-size", type=int, default=32, help="Tile size for change detection")
+    parser.add_argument(
+        "--change-threshold",
+        type=float,
+        default=3.0,
+        help="Mean absolute difference above which a tile is re-segmented",
+    )
+    parser.add_argument("--max-colors", type=int, help="Override selected detail preset color count")
+    parser.add_argument("--disable-slic", action="store_true", help="Use KMeans-only segmentation")
+    parser.add_argument("--palette", type=Path, help="Shared palette JSON; loaded if it exists, otherwise saved")
+    _add_trace_arguments(parser)
+    parser.add_argument("--debug", action="store_true", help="Enable debug logging")
+    return parser
+
+
+def _add_trace_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--min-region-area", type=int, default=20)
+    parser.add_argument("--simplification", type=float, help="Override selected detail preset simplification ratio")
+    parser.add_argument("--no-edge-layer", action="store_true", help="Omit the edge stroke layer")
+    parser.add_argument("--no-detail-layer", action="store_true", help="Omit the detail stroke layer")
+    parser.add_argument(
+        "--dedupe-shapes",
+        action="store_true",
+        help="Emit paths repeated up to translation once as <symbol> referenced by <use>",
+    )
+    parser.add_argument("--svgz", action="store_true", help="Write gzip-compressed .svgz files")
+
+
+def _apply_trace_arguments(config: PipelineConfig, args: argparse.Namespace) -> None:
+    config.include_edge_layer = not args.no_edge_layer
+    config.include_detail_layer = not args.no_detail_layer
+    config.dedupe_shapes = args.dedupe_shapes
+    config.compress_output = args.svgz
+    if args.simplification is not None:
+        value = max(0.0, float(args.simplification))
+        config.simplification_low = value
+        config.simplification_high = value
+        config.simplification_ultra = value
+
+
+def _apply_max_colors(config: PipelineConfig, max_colors: int | None) -> None:
+    if max_colors is not None:
+        value = max(1, int(max_colors))
+        config.max_colors_low = value
+        config.max_colors_high = value
+        config.max_colors_ultra = value
+
+
+def _format_shape_reuse(plan: ShapeReusePlan | None) -> str:
+    if plan is None:
+        return ""
+    return f" | shapes: {plan.paths_replaced} paths -> {len(plan.symbols)} symbols, {plan.bytes_saved} bytes saved"
+
+
+def _configure_logging(debug: bool) -> None:
     logging.basicConfig(
-        level=logging.DEBUG if args.debug else logging.INFO,
+        level=logging.DEBUG if debug else logging.INFO,
         format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
     )
 
+
+def main(argv: list[str] | None = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "retrace":
+        retrace_main(argv[1:])
+        return
+    if argv and argv[0] == "sequence":
+        sequence_main(argv[1:])
+        return
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    _configure_logging(args.debug)
+
     config = PipelineConfig(
         detail=DetailPreset(args.detail),
         output_dir=args.output_dir,
@@ -38,21 +174,99 @@ def main() -> None:
         auto_iterate=not args.no_auto_iterate,
         min_region_area=args.min_region_area,
         use_slic=not args.disable_slic,
+        denoiser=args.denoiser,
+        shared_palette=args.shared_palette or args.palette is not None,
+        palette_file=args.palette,
+        save_intermediates=args.save_intermediates,
+        memory_lean=args.memory_lean,
+        prefetch_depth=args.prefetch_depth,
+        write_queue_depth=args.write_queue_depth,
+        compute_workers=args.workers,
+        schedule_batch=not args.no_schedule,
+        cost_model_file=args.cost_model,
     )
+    _apply_trace_arguments(config, args)
 
-    if args.max_colors is not None:
-        value = max(1, int(args.max_colors))
-        config.max_colors_low = value
-        config.max_colors_high = value
-        config.max_colors_ultra = value
+    _apply_max_colors(config, args.max_colors)
+
+    pipeline = VectorizationPipeline(config)
+    if args.show_schedule:
+        schedule = pipeline.schedule(collect_inputs(args.input))
+        for rank, item in enumerate(schedule, start=1):
+            print(
+                f"{rank:>4}. {item.path} | {item.features.megapixels:.2f} MP | "
+                f"edges={item.features.edge_density:.3f} | predicted={item.predicted_seconds:.2f}s"
+            )
+        print(f"predicted makespan={predicted_makespan(schedule, config.compute_workers):.2f}s")
+        return
 
-    results = VectorizationPipeline(config).run(args.input)
+    results = pipeline.run(args.input)
 
     for res in results:
+        timing = ""
+        if res.elapsed_seconds is not None:
+            predicted = f"{res.predicted_seconds:.2f}s" if res.predicted_seconds is not None else "n/a"
+            timing = f" | predicted={predicted} actual={res.elapsed_seconds:.2f}s"
+        shapes = _format_shape_reuse(res.shape_reuse)
         if res.report is None:
-            print(f"[OK] {res.source} -> {res.output} | validation=skipped")
+            print(f"[OK] {res.source} -> {res.output} | validation=skipped{timing}{shapes}")
         else:
-            print(f"[OK] {res.source} -> {res.output} | SSIM={res.report.ssim:.4f} | MSE={res.report.mse:.2f}")
+            print(
+                f"[OK] {res.source} -> {res.output} | SSIM={res.report.ssim:.4f} | MSE={res.report.mse:.2f}{timing}{shapes}"
+            )
+
+
+def retrace_main(argv: list[str]) -> None:
+    parser = build_retrace_parser()
+    args = parser.parse_args(argv)
+    _configure_logging(args.debug)
+
+    artifacts = collect_artifacts(args.input)
+    if args.output is not None and len(artifacts) > 1:
+        parser.error("--output requires a single artifact file")
+
+    config = PipelineConfig(
+        detail=DetailPreset(args.detail or DetailPreset.HIGH.value),
+        output_dir=args.output_dir,
+        min_region_area=args.min_region_area,
+        validate_similarity=False,
+    )
+    _apply_trace_arguments(config, args)
+
+    pipeline = VectorizationPipeline(config)
+    for artifact_path in artifacts:
+        res = pipeline.retrace(
+            artifact_path,
+            args.output,
+            use_recorded_detail=args.detail is None,
+            use_recorded_simplification=args.detail is None and args.simplification is None,
+        )
+        print(f"[OK] {artifact_path} -> {res.output} | retraced{_format_shape_reuse(res.shape_reuse)}")
+
+
+def sequence_main(argv: list[str]) -> None:
+    parser = build_sequence_parser()
+    args = parser.parse_args(argv)
+    _configure_logging(args.debug)
+
+    config = PipelineConfig(
+        detail=DetailPreset(args.detail),
+        output_dir=args.output_dir,
+        min_region_area=args.min_region_area,
+        use_slic=not args.disable_slic,
+        validate_similarity=False,
+        shared_palette=True,
+        palette_file=args.palette,
+        sequence_block_size=args.block_size,
+        sequence_change_threshold=args.change_threshold,
+        frame_duration_ms=args.frame_duration,
+    )
+    _apply_trace_arguments(config, args)
+    _apply_max_colors(config, args.max_colors)
+
+    results = VectorizationPipeline(config).run_sequence(args.input, animated=args.animated)
+    for res in results:
+        print(f"[OK] {res.source} -> {res.output}")
 
 
 if __name__ == "__main__":
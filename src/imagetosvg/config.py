@@ -5,6 +5,9 @@ from enum import Enum
 from pathlib import Path
 
 
+DENOISERS = ("bilateral", "bilateral_lowres", "guided")
+
+
 class DetailPreset(str, Enum):
     LOW = "low"
     HIGH = "high"
@@ -16,6 +19,7 @@ class PipelineConfig:
     detail: DetailPreset = DetailPreset.HIGH
     output_dir: Path = Path("output")
     preserve_alpha: bool = True
+    alpha_threshold: int = 0
     min_region_area: int = 20
 
     max_colors_low: int = 18
@@ -23,6 +27,9 @@ class PipelineConfig:
     max_colors_ultra: int = 72
 
     use_slic: bool = True
+    shared_palette: bool = False
+    palette_file: Path | None = None
+    palette_sample_size: int = 8
     slic_segments_low: int = 180
     slic_segments_high: int = 350
     slic_segments_ultra: int = 700
@@ -32,6 +39,7 @@ class PipelineConfig:
     canny_high: int = 130
     edge_dilate_iterations: int = 1
 
+    denoiser: str = "bilateral"
     denoise_sigma: float = 28.0
     adaptive_block_size: int = 35
     adaptive_c: int = 3
@@ -40,13 +48,31 @@ class PipelineConfig:
     simplification_high: float = 0.0012
     simplification_ultra: float = 0.00045
 
+    include_edge_layer: bool = True
+    include_detail_layer: bool = True
+
+    dedupe_shapes: bool = False
+
     embed_metadata: bool = True
+    save_intermediates: bool = False
+    compress_output: bool = False
+    memory_lean: bool = False
     validate_similarity: bool = True
     auto_iterate: bool = True
     min_ssim_low: float = 0.78
     min_ssim_high: float = 0.86
     min_ssim_ultra: float = 0.91
 
+    sequence_block_size: int = 32
+    sequence_change_threshold: float = 3.0
+    frame_duration_ms: int = 100
+
+    prefetch_depth: int = 2
+    write_queue_depth: int = 4
+    compute_workers: int = 1
+    schedule_batch: bool = True
+    cost_model_file: Path | None = None
+
     def max_colors(self) -> int:
         return {
             DetailPreset.LOW: self.max_colors_low,
@@ -75,14 +101,30 @@ class PipelineConfig:
             DetailPreset.ULTRA: self.min_ssim_ultra,
         }[self.detail]
 
+    def output_suffix(self) -> str:
+        return ".svgz" if self.compress_output else ".svg"
+
+    def cost_model_path(self) -> Path:
+        return self.cost_model_file or self.output_dir / ".imagetosvg_costs.json"
+
     def validated(self) -> PipelineConfig:
         self.min_region_area = max(1, self.min_region_area)
+        self.alpha_threshold = min(254, max(0, self.alpha_threshold))
         self.edge_dilate_iterations = max(0, self.edge_dilate_iterations)
         self.denoise_sigma = max(1.0, self.denoise_sigma)
+        if self.denoiser not in DENOISERS:
+            raise ValueError(f"Unknown denoiser {self.denoiser!r}; expected one of {', '.join(DENOISERS)}")
         self.slic_compactness = max(0.1, self.slic_compactness)
         self.slic_segments_low = max(20, self.slic_segments_low)
         self.slic_segments_high = max(20, self.slic_segments_high)
         self.slic_segments_ultra = max(20, self.slic_segments_ultra)
+        self.palette_sample_size = max(1, self.palette_sample_size)
+        self.sequence_block_size = max(8, self.sequence_block_size)
+        self.sequence_change_threshold = max(0.0, self.sequence_change_threshold)
+        self.frame_duration_ms = max(10, self.frame_duration_ms)
+        self.prefetch_depth = max(1, self.prefetch_depth)
+        self.write_queue_depth = max(1, self.write_queue_depth)
+        self.compute_workers = max(1, self.compute_workers)
 
         block = self.adaptive_block_size
         if block < 3:
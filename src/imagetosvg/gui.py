@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import queue
+import threading
 import tkinter as tk
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
 from tkinter import filedialog, messagebox, ttk
 
@@ -9,7 +12,10 @@ import numpy as np
 from PIL import Image, ImageTk
 
 from .config import DetailPreset, PipelineConfig
-from .pipeline import VectorizationPipeline
+from .io import read_image
+from .pipeline import PipelineResult, VectorizationPipeline
+from .preprocess import preprocess_image
+from .segmentation import render_labels, segment_colors
 
 try:
     from tkinterdnd2 import DND_FILES, TkinterDnD  # type: ignore
@@ -17,6 +23,14 @@ except ImportError:  # optional
     DND_FILES = None
     TkinterDnD = None
 
+PREVIEW_BOX = (520, 640)
+PROXY_MAX_SIDE = 320
+POLL_MS = 50
+
+
+class JobCancelled(Exception):
+    pass
+
 
 class App:
     def __init__(self, root: tk.Tk):
@@ -25,18 +39,33 @@ class App:
         self.root.geometry("1100x700")
 
         self.input_path: Path | None = None
+        self.proxy_image: np.ndarray | None = None
         self.preview_original: ImageTk.PhotoImage | None = None
         self.preview_result: ImageTk.PhotoImage | None = None
 
+        # Workers never touch Tk; they post (kind, payload) messages that _poll applies on the main thread.
+        self.events: queue.Queue[tuple[str, object]] = queue.Queue()
+        self.job_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="imagetosvg-job")
+        self.preview_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="imagetosvg-preview")
+        self.cancel_event = threading.Event()
+        self.job: Future | None = None
+        self.preview_generation = 0
+
         self.detail = tk.StringVar(value=DetailPreset.HIGH.value)
+        self.detail.trace_add("write", lambda *_: self._schedule_preview())
         self._build()
+        self.root.protocol("WM_DELETE_WINDOW", self._close)
+        self.root.after(POLL_MS, self._poll)
 
     def _build(self) -> None:
         controls = ttk.Frame(self.root, padding=10)
         controls.pack(fill=tk.X)
 
         ttk.Button(controls, text="Select Image", command=self._pick_file).pack(side=tk.LEFT)
-        ttk.Button(controls, text="Run", command=self._run).pack(side=tk.LEFT, padx=8)
+        self.run_button = ttk.Button(controls, text="Run", command=self._run)
+        self.run_button.pack(side=tk.LEFT, padx=8)
+        self.cancel_button = ttk.Button(controls, text="Cancel", command=self._cancel, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.LEFT)
 
         ttk.Label(controls, text="Detail").pack(side=tk.LEFT, padx=(20, 4))
         ttk.Combobox(
@@ -47,6 +76,9 @@ class App:
             width=8,
         ).pack(side=tk.LEFT)
 
+        self.progress = ttk.Progressbar(controls, mode="indeterminate", length=120)
+        self.progress.pack(side=tk.LEFT, padx=(16, 0))
+
         self.status = ttk.Label(controls, text="Drop an image or click Select Image")
         self.status.pack(side=tk.LEFT, padx=16)
 
@@ -77,59 +109,155 @@ class App:
         self.status.configure(text=f"Selected: {path.name}")
         self.preview_original = self._to_photo(path)
         self.orig_label.configure(image=self.preview_original)
+        self.proxy_image = self._load_proxy(path)
+        self._schedule_preview()
 
     def _to_photo(self, path: Path) -> ImageTk.PhotoImage:
-        image = Image.open(path)
-        image.thumbnail((520, 640))
-        return ImageTk.PhotoImage(image)
+        return ImageTk.PhotoImage(self._to_pil(path))
+
+    def _load_proxy(self, path: Path) -> np.ndarray | None:
+        try:
+            image = read_image(path)
+        except ValueError:
+            return None
+        h, w = image.shape[:2]
+        scale = min(1.0, PROXY_MAX_SIDE / max(h, w))
+        if scale < 1.0:
+            image = cv2.resize(image, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+        return image
+
+    def _schedule_preview(self) -> None:
+        """Render a quick segmentation preview of the downscaled proxy for the selected preset."""
+        if self.proxy_image is None or (self.job is not None and not self.job.done()):
+            return
+        self.preview_generation += 1
+        generation = self.preview_generation
+        config = PipelineConfig(detail=DetailPreset(self.detail.get()), validate_similarity=False).validated()
+        future = self.preview_executor.submit(_render_proxy_preview, self.proxy_image, config)
+        future.add_done_callback(lambda f: self.events.put(("preview", (generation, f))))
 
     def _run(self) -> None:
         if not self.input_path:
             messagebox.showwarning("Missing input", "Please select an image first.")
             return
+        if self.job is not None and not self.job.done():
+            return
 
+        self.cancel_event.clear()
+        # Discard proxy previews still in flight; they must not replace the full render.
+        self.preview_generation += 1
+        self.run_button.configure(state=tk.DISABLED)
+        self.cancel_button.configure(state=tk.NORMAL)
+        self.progress.start(12)
         self.status.configure(text="Processing...")
-        self.root.update_idletasks()
 
+        config = PipelineConfig(detail=DetailPreset(self.detail.get()), output_dir=Path("output"))
+        self.job = self.job_executor.submit(self._run_job, self.input_path, config)
+        self.job.add_done_callback(lambda f: self.events.put(("done", f)))
+
+    def _run_job(self, path: Path, config: PipelineConfig) -> tuple[PipelineResult, Image.Image | None]:
+        def on_progress(stage: str) -> None:
+            if self.cancel_event.is_set():
+                raise JobCancelled()
+            self.events.put(("progress", stage))
+
+        result = VectorizationPipeline(config).run(path, progress=on_progress)[0]
+        on_progress("rendering preview")
+        return result, self._render_svg_preview(result.output)
+
+    def _cancel(self) -> None:
+        if self.job is not None and not self.job.done():
+            self.cancel_event.set()
+            self.status.configure(text="Cancelling...")
+
+    def _poll(self) -> None:
         try:
-            config = PipelineConfig(detail=DetailPreset(self.detail.get()), output_dir=Path("output"))
-            pipeline = VectorizationPipeline(config)
-            result = pipeline.run(self.input_path)[0]
-        except Exception as exc:
+            while True:
+                kind, payload = self.events.get_nowait()
+                if kind == "progress":
+                    self.status.configure(text=f"Processing: {payload}")
+                elif kind == "preview":
+                    self._show_preview(*payload)
+                elif kind == "done":
+                    self._finish(payload)
+        except queue.Empty:
+            pass
+        self.root.after(POLL_MS, self._poll)
+
+    def _show_preview(self, generation: int, future: Future) -> None:
+        if generation != self.preview_generation or future.exception() is not None:
+            return
+        if self.job is not None and not self.job.done():
+            return
+        self.preview_result = ImageTk.PhotoImage(future.result())
+        self.svg_label.configure(image=self.preview_result)
+        self.status.configure(text=f"Preview ({self.detail.get()}, downscaled) - click Run for full resolution")
+
+    def _finish(self, future: Future) -> None:
+        self.progress.stop()
+        self.run_button.configure(state=tk.NORMAL)
+        self.cancel_button.configure(state=tk.DISABLED)
+
+        exc = future.exception()
+        if isinstance(exc, JobCancelled):
+            self.status.configure(text="Cancelled")
+            return
+        if exc is not None:
             messagebox.showerror("Vectorization failed", str(exc))
             self.status.configure(text="Failed")
             return
 
-        png_preview = self._render_svg_preview(result.output)
-        self.preview_result = ImageTk.PhotoImage(png_preview)
-        self.svg_label.configure(image=self.preview_result)
+        result, png_preview = future.result()
+        if png_preview is None:
+            messagebox.showwarning("Preview unavailable", "Install cairosvg for SVG preview rendering.")
+        else:
+            self.preview_result = ImageTk.PhotoImage(png_preview)
+            self.svg_label.configure(image=self.preview_result)
 
         if result.report:
             self.status.configure(text=f"Done: SSIM={result.report.ssim:.4f} | MSE={result.report.mse:.2f}")
         else:
             self.status.configure(text="Done: validation skipped (CairoSVG unavailable)")
 
-    def _render_svg_preview(self, path: Path) -> Image.Image:
+    def _render_svg_preview(self, path: Path) -> Image.Image | None:
         try:
             import cairosvg
-        except ImportError:
-            messagebox.showwarning("Preview unavailable", "Install cairosvg for SVG preview rendering.")
-            if self.input_path:
-                return self._to_pil(self.input_path)
-            return Image.new("RGB", (520, 640), "#222")
+        except Exception:
+            return None
 
-        png_bytes = cairosvg.svg2png(url=str(path))
+        png_bytes = cairosvg.svg2png(url=str(path), output_width=PREVIEW_BOX[0])
         arr = cv2.imdecode(np.frombuffer(png_bytes, np.uint8), cv2.IMREAD_COLOR)
         if arr is None:
-            return Image.new("RGB", (520, 640), "#222")
-        arr = cv2.cvtColor(arr, cv2.COLOR_BGR2RGB)
-        return Image.fromarray(arr).resize((520, 640))
+            return Image.new("RGB", PREVIEW_BOX, "#222")
+        image = Image.fromarray(cv2.cvtColor(arr, cv2.COLOR_BGR2RGB))
+        image.thumbnail(PREVIEW_BOX)
+        return image
 
     def _to_pil(self, path: Path) -> Image.Image:
         image = Image.open(path)
-        image.thumbnail((520, 640))
+        image.thumbnail(PREVIEW_BOX)
         return image
 
+    def _close(self) -> None:
+        self.cancel_event.set()
+        self.job_executor.shutdown(wait=False, cancel_futures=True)
+        self.preview_executor.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
+
+
+def _render_proxy_preview(proxy: np.ndarray, config: PipelineConfig) -> Image.Image:
+    """Flat-color segmentation of the proxy with edges overlaid, scaled to the preview box."""
+    enhanced, edges, _ = preprocess_image(proxy, config)
+    segmented = segment_colors(enhanced, config)
+    preview = render_labels(segmented.labels, segmented.palette)
+    preview[edges > 0] = (preview[edges > 0] * 0.55).astype(np.uint8)
+
+    h, w = preview.shape[:2]
+    scale = min(PREVIEW_BOX[0] / w, PREVIEW_BOX[1] / h)
+    size = (max(1, int(w * scale)), max(1, int(h * scale)))
+    preview = cv2.resize(preview, size, interpolation=cv2.INTER_NEAREST)
+    return Image.fromarray(cv2.cvtColor(preview, cv2.COLOR_BGR2RGB))
+
 
 def launch_gui() -> None:
     if TkinterDnD:
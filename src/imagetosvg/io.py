@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import gzip
+import struct
 from pathlib import Path
 from typing import Iterable
 
@@ -22,19 +24,65 @@ def collect_inputs(input_path: Path) -> list[Path]:
     return sorted(files)
 
 
-def read_image(path: Path) -> np.ndarray:
+def read_image(path: Path, mmap: bool = False) -> np.ndarray:
+    """Decode an image; with ``mmap``, formats stored as raw pixels are memory-mapped read-only instead."""
+    if mmap:
+        mapped = _map_uncompressed_bmp(path)
+        if mapped is not None:
+            return mapped
     image = cv2.imread(str(path), cv2.IMREAD_UNCHANGED)
     if image is None:
         raise ValueError(f"Could not read image: {path}")
     return image
 
 
+def _map_uncompressed_bmp(path: Path) -> np.ndarray | None:
+    """Memory-map a 24-bit uncompressed BMP as a BGR view, or return None for any other file."""
+    if path.suffix.lower() != ".bmp":
+        return None
+    with path.open("rb") as fh:
+        header = fh.read(34)
+    if len(header) < 34 or header[:2] != b"BM":
+        return None
+    (offset,) = struct.unpack_from("<I", header, 10)
+    dib_size, width, height, planes, bits, compression = struct.unpack_from("<IiiHHI", header, 14)
+    if dib_size < 40 or planes != 1 or bits != 24 or compression != 0 or width <= 0 or height == 0:
+        return None
+
+    stride = (width * 3 + 3) & ~3
+    rows = abs(height)
+    try:
+        data = np.memmap(path, dtype=np.uint8, mode="r", offset=offset, shape=(rows * stride,))
+    except ValueError:
+        return None
+    image = np.ndarray((rows, width, 3), dtype=np.uint8, buffer=data, strides=(stride, 3, 1))
+    # Positive heights are stored bottom-up.
+    return image[::-1] if height > 0 else image
+
+
 def write_text(path: Path, content: str) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     path.write_text(content, encoding="utf-8")
 
 
-def ensure_output_paths(images: Iterable[Path], output_dir: Path) -> dict[Path, Path]:
+def write_svg(path: Path, content: str) -> None:
+    """Write SVG markup, gzip-compressed when the target uses the ``.svgz`` suffix."""
+    if path.suffix.lower() != ".svgz":
+        write_text(path, content)
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(gzip.compress(content.encode("utf-8"), compresslevel=6))
+
+
+def read_svg(path: Path) -> str:
+    """Read SVG markup written by :func:`write_svg`, decompressing ``.svgz`` files."""
+    data = path.read_bytes()
+    if path.suffix.lower() == ".svgz":
+        data = gzip.decompress(data)
+    return data.decode("utf-8")
+
+
+def ensure_output_paths(images: Iterable[Path], output_dir: Path, suffix: str = ".svg") -> dict[Path, Path]:
     output_dir.mkdir(parents=True, exist_ok=True)
 
     images_list = list(images)
@@ -45,9 +93,9 @@ def ensure_output_paths(images: Iterable[Path], output_dir: Path) -> dict[Path,
     mapping: dict[Path, Path] = {}
     for img in images_list:
         if stems[img.stem] == 1:
-            mapping[img] = output_dir / f"{img.stem}.svg"
+            mapping[img] = output_dir / f"{img.stem}{suffix}"
         else:
             parent = img.parent.name or "root"
-            mapping[img] = output_dir / f"{parent}_{img.stem}.svg"
+            mapping[img] = output_dir / f"{parent}_{img.stem}{suffix}"
 
     return mapping
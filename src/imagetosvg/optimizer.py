@@ -1,21 +1,63 @@
 from __future__ import annotations
 
 import logging
-from dataclasses import replace
+from dataclasses import dataclass, replace
 from pathlib import Path
+from typing import Callable
 
+from .artifacts import PipelineArtifacts, artifact_path_for, save_artifacts
 from .config import PipelineConfig
-from .io import write_text
-from .preprocess import preprocess_image
+from .io import write_svg
+from .palette import SharedPalette
+from .preprocess import PreprocessEngine
 from .segmentation import segment_colors
-from .svg_builder import build_svg
+from .svg_builder import ShapeReusePlan, build_svg_with_reuse
 from .tracing import trace_layers
-from .validator import ValidationReport, validate_similarity
+from .validator import ValidationReport, validate_svg_text
 
 logger = logging.getLogger(__name__)
 
+# Receives short stage descriptions; raising from it aborts the render (used for cancellation).
+ProgressCallback = Callable[[str], None]
 
-def optimize_and_render(image, source: Path, config: PipelineConfig, output_path: Path) -> tuple[str, ValidationReport | None]:
+
+@dataclass(slots=True)
+class RenderOutcome:
+    svg_text: str
+    report: ValidationReport | None
+    artifacts: PipelineArtifacts | None = None
+    shape_reuse: ShapeReusePlan | None = None
+
+
+def optimize_and_render(
+    image, source: Path, config: PipelineConfig, output_path: Path, palette: SharedPalette | None = None
+) -> tuple[str, ValidationReport | None]:
+    outcome = render_best(image, source, config, palette=palette)
+    write_outcome(output_path, outcome)
+    return outcome.svg_text, outcome.report
+
+
+def write_outcome(output_path: Path, outcome: RenderOutcome) -> None:
+    if outcome.svg_text:
+        write_svg(output_path, outcome.svg_text)
+    if outcome.artifacts is not None:
+        save_artifacts(artifact_path_for(output_path), outcome.artifacts)
+
+
+def render_best(
+    image,
+    source: Path,
+    config: PipelineConfig,
+    palette: SharedPalette | None = None,
+    progress: ProgressCallback | None = None,
+    engine: PreprocessEngine | None = None,
+) -> RenderOutcome:
+    """Run the candidate loop in memory and return the best SVG; performs no file I/O.
+
+    Pass a long-lived ``engine`` to reuse its scratch buffers across images; its cached
+    base stage is dropped on return so the next image does not keep this one alive.
+    """
+    report_stage = progress or (lambda stage: None)
     candidates = [config]
     if config.auto_iterate and config.validate_similarity:
         candidates.extend(
@@ -25,35 +67,65 @@ def optimize_and_render(image, source: Path, config: PipelineConfig, output_path
             ]
         )
 
-    best_svg = ""
-    best_report: ValidationReport | None = None
+    best: RenderOutcome | None = None
     best_score = -1.0
+    engine = engine or PreprocessEngine()
 
-    for idx, cand in enumerate(candidates, start=1):
-        enhanced, edges, detail_map = preprocess_image(image, cand)
-        segmented = segment_colors(enhanced, cand)
-        trace = trace_layers(segmented, edges, detail_map, cand)
-        svg_text = build_svg(trace, (image.shape[1], image.shape[0]), cand, source=source)
-        write_text(output_path, svg_text)
-
-        report = validate_similarity(image, output_path) if cand.validate_similarity else None
-        score = report.ssim if report else 0.0
-
-        logger.info("candidate=%s ssim=%s", idx, f"{score:.4f}" if report else "n/a")
+    try:
+        for idx, cand in enumerate(candidates, start=1):
+            step = f"candidate {idx}/{len(candidates)}"
+            report_stage(f"{step}: preprocessing")
+            pre = engine.run(image, cand)
+            enhanced, edges, detail_map = pre.as_tuple()
+            report_stage(f"{step}: segmenting")
+            segmented = segment_colors(enhanced, cand, palette=palette, lab=pre.lab)
+            report_stage(f"{step}: tracing")
+            trace = trace_layers(segmented, edges, detail_map, cand)
+            report_stage(f"{step}: building SVG")
+            svg_text, reuse = build_svg_with_reuse(trace, (image.shape[1], image.shape[0]), cand, source=source)
+            artifacts = (
+                PipelineArtifacts(
+                    source,
+                    enhanced,
+                    edges,
+                    detail_map,
+                    segmented,
+                    detail=cand.detail,
+                    simplification=cand.simplification_ratio(),
+                )
+                if config.save_intermediates
+                else None
+            )
+            # Release this candidate's edge maps, labels and trace before validation allocates its render.
+            # The engine still caches enhanced/lab/gray for the next candidate unless memory_lean drops them.
+            del pre, enhanced, edges, detail_map, segmented, trace
+            if config.memory_lean:
+                engine.clear()
 
-        if report is None:
-            if best_svg == "":
-                best_svg, best_report, best_score = svg_text, None, 0.0
-            continue
+            if cand.validate_similarity:
+                report_stage(f"{step}: validating")
+            report = validate_svg_text(image, svg_text) if cand.validate_similarity else None
+            score = report.ssim if report else 0.0
 
-        if score > best_score:
-            best_svg, best_report, best_score = svg_text, report, score
+            logger.info("candidate=%s ssim=%s", idx, f"{score:.4f}" if report else "n/a")
+            outcome = RenderOutcome(
+                svg_text=svg_text,
+                report=report,
+                artifacts=artifacts,
+                shape_reuse=reuse if cand.dedupe_shapes else None,
+            )
 
-        if score >= cand.target_ssim():
-            best_svg, best_report = svg_text, report
-            break
+            if report is None:
+                if best is None:
+                    best, best_score = outcome, 0.0
+                continue
 
-    if best_svg:
-        write_text(output_path, best_svg)
+            if score > best_score:
+                best, best_score = outcome, score
 
-    return best_svg, best_report
+            if score >= cand.target_ssim():
+                best = outcome
+                break
+    finally:
+        engine.clear(buffers=False)
+    return best or RenderOutcome(svg_text="", report=None)
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+import cv2
+import numpy as np
+
+from .config import PipelineConfig
+from .preprocess import opaque_mask, preprocess_image
+
+LUT_BITS = 5
+_LUT_SHIFT = 8 - LUT_BITS
+_SAMPLE_MAX_SIDE = 256
+_SAMPLE_MAX_PIXELS = 200_000
+
+
+@dataclass(slots=True)
+class SharedPalette:
+    """Fixed palette with a precomputed nearest-color lookup table over quantized 8-bit LAB."""
+
+    colors_bgr: np.ndarray
+    lut: np.ndarray
+
+    @classmethod
+    def from_bgr(cls, colors_bgr: np.ndarray) -> SharedPalette:
+        colors_bgr = np.asarray(colors_bgr, dtype=np.uint8).reshape(-1, 3)
+        if colors_bgr.shape[0] == 0:
+            raise ValueError("Palette must contain at least one color")
+        colors_lab = cv2.cvtColor(colors_bgr.reshape(1, -1, 3), cv2.COLOR_BGR2LAB).reshape(-1, 3).astype(np.float32)
+        return cls(colors_bgr=colors_bgr, lut=_build_lut(colors_lab))
+
+    def assign(self, lab: np.ndarray) -> np.ndarray:
+        """Map 8-bit LAB values (any leading shape, last axis = 3) to palette indices."""
+        idx = np.asarray(lab, dtype=np.uint8) >> _LUT_SHIFT
+        return self.lut[idx[..., 0], idx[..., 1], idx[..., 2]].astype(np.int32)
+
+
+def _build_lut(colors_lab: np.ndarray) -> np.ndarray:
+    size = 1 << LUT_BITS
+    centers = (np.arange(size, dtype=np.float32) + 0.5) * (1 << _LUT_SHIFT)
+    grid = np.stack(np.meshgrid(centers, centers, centers, indexing="ij"), axis=-1).reshape(-1, 3)
+    dist = (colors_lab**2).sum(axis=1)[None, :] - 2.0 * grid @ colors_lab.T
+    dtype = np.uint8 if colors_lab.shape[0] <= 256 else np.uint16
+    return dist.argmin(axis=1).astype(dtype).reshape(size, size, size)
+
+
+def learn_palette(images: Iterable[np.ndarray], config: PipelineConfig, seed: int = 0) -> SharedPalette:
+    """Cluster downscaled, preprocessed samples into ``config.max_colors()`` shared colors.
+
+    Fully transparent pixels (see ``PipelineConfig.alpha_threshold``) are left out, matching
+    per-image segmentation.
+    """
+    samples = []
+    for image in images:
+        h, w = image.shape[:2]
+        scale = min(1.0, _SAMPLE_MAX_SIDE / max(h, w))
+        if scale < 1.0:
+            image = cv2.resize(image, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+        enhanced, _, _ = preprocess_image(image, config)
+        bgr = enhanced[:, :, :3] if enhanced.shape[2] == 4 else enhanced
+        lab = cv2.cvtColor(bgr, cv2.COLOR_BGR2LAB)
+        opaque = opaque_mask(image, config)
+        samples.append(lab.reshape(-1, 3) if opaque is None else lab[opaque])
+    if not samples:
+        raise ValueError("No sample images to learn a palette from")
+    if not any(len(sample) for sample in samples):
+        raise ValueError("Sample images contain no opaque pixels to learn a palette from")
+
+    pixels = np.concatenate(samples).astype(np.float32)
+    if len(pixels) > _SAMPLE_MAX_PIXELS:
+        rng = np.random.default_rng(seed)
+        pixels = pixels[rng.choice(len(pixels), _SAMPLE_MAX_PIXELS, replace=False)]
+
+    k = max(1, min(config.max_colors(), int(np.unique(pixels, axis=0).shape[0])))
+    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 120, 0.2)
+    cv2.setRNGSeed(seed)
+    _, _, centers = cv2.kmeans(pixels, k, None, criteria, attempts=4, flags=cv2.KMEANS_PP_CENTERS)
+
+    centers_lab = np.clip(np.rint(centers), 0, 255).astype(np.uint8).reshape(1, -1, 3)
+    colors_bgr = cv2.cvtColor(centers_lab, cv2.COLOR_LAB2BGR).reshape(-1, 3)
+    return SharedPalette.from_bgr(np.unique(colors_bgr, axis=0))
+
+
+def load_palette(path: Path) -> SharedPalette:
+    """Load a palette stored as a JSON list of ``#rrggbb`` colors (or ``{"colors": [...]}``)."""
+    data = json.loads(path.read_text(encoding="utf-8"))
+    colors = data.get("colors", []) if isinstance(data, dict) else data
+    bgr = []
+    for value in colors:
+        text = str(value).lstrip("#")
+        if len(text) != 6:
+            raise ValueError(f"Invalid palette color {value!r} in {path}")
+        r, g, b = (int(text[i : i + 2], 16) for i in (0, 2, 4))
+        bgr.append((b, g, r))
+    return SharedPalette.from_bgr(np.array(bgr, dtype=np.uint8))
+
+
+def save_palette(path: Path, palette: SharedPalette) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    colors = [f"#{int(c[2]):02x}{int(c[1]):02x}{int(c[0]):02x}" for c in palette.colors_bgr]
+    path.write_text(json.dumps({"colors": colors}, indent=2), encoding="utf-8")
@@ -1,12 +1,29 @@
 from __future__ import annotations
 
 import logging
-from dataclasses import dataclass
+import threading
+import time
+from dataclasses import dataclass, replace
 from pathlib import Path
 
+from .artifacts import ARTIFACT_SUFFIX, load_artifacts
+from .batch import StagedBatchRunner
 from .config import PipelineConfig
-from .io import collect_inputs, ensure_output_paths, read_image
-from .optimizer import optimize_and_render
+from .io import collect_inputs, ensure_output_paths, read_image, write_svg
+from .optimizer import ProgressCallback, RenderOutcome, render_best, write_outcome
+from .palette import SharedPalette, learn_palette, load_palette, save_palette
+from .preprocess import PreprocessEngine
+from .scheduler import (
+    CostModel,
+    ImageCostFeatures,
+    ScheduledImage,
+    measure_features,
+    predicted_makespan,
+    schedule_longest_first,
+)
+from .sequence import SequenceVectorizer, read_frames
+from .svg_builder import ShapeReusePlan, build_animated_svg, build_svg, build_svg_with_reuse
+from .tracing import trace_layers
 from .validator import ValidationReport
 
 logger = logging.getLogger(__name__)
@@ -17,22 +34,196 @@ class PipelineResult:
     source: Path
     output: Path
     report: ValidationReport | None
+    predicted_seconds: float | None = None
+    elapsed_seconds: float | None = None
+    shape_reuse: ShapeReusePlan | None = None
 
 
 class VectorizationPipeline:
     def __init__(self, config: PipelineConfig):
         self.config = config.validated()
 
-    def run(self, input_path: Path) -> list[PipelineResult]:
+    def run(self, input_path: Path, progress: ProgressCallback | None = None) -> list[PipelineResult]:
         images = collect_inputs(input_path)
-        targets = ensure_output_paths(images, self.config.output_dir)
-        results: list[PipelineResult] = []
+        targets = ensure_output_paths(images, self.config.output_dir, suffix=self.config.output_suffix())
 
-        for image_path in images:
+        palette = self.shared_palette(images) if self.config.shared_palette else None
+
+        model: CostModel | None = None
+        schedule: dict[Path, ScheduledImage] = {}
+        order = images
+        if self.config.schedule_batch and len(images) > 1:
+            model = CostModel.load(self.config.cost_model_path())
+            ordered = self.schedule(images, model)
+            schedule = {item.path: item for item in ordered}
+            order = [item.path for item in ordered]
+
+        # One preprocessing engine per compute worker, so scratch buffers are reused across images.
+        engines = threading.local()
+
+        def process(image_path: Path, image) -> tuple[RenderOutcome, float, ImageCostFeatures | None]:
             logger.info("Vectorizing %s", image_path)
-            image = read_image(image_path)
-            output_path = targets[image_path]
-            _, report = optimize_and_render(image, image_path, self.config, output_path)
-            results.append(PipelineResult(source=image_path, output=output_path, report=report))
+            if progress is not None:
+                progress(f"{image_path.name}: started")
+            # The schedule only saw file headers; measure the decoded image for the model refit.
+            features = measure_features(image, self.config) if model is not None else None
+            started = time.perf_counter()
+            if not hasattr(engines, "engine"):
+                engines.engine = PreprocessEngine()
+            outcome = render_best(
+                image, image_path, self.config, palette=palette, progress=progress, engine=engines.engine
+            )
+            return outcome, time.perf_counter() - started, features
+
+        def write(image_path: Path, result: tuple[RenderOutcome, float, ImageCostFeatures | None]) -> None:
+            write_outcome(targets[image_path], result[0])
+
+        def summarize(result: tuple[RenderOutcome, float, ImageCostFeatures | None]):
+            # Keep only what the results need; the SVG text and artifacts go to the writer alone.
+            outcome, elapsed, features = result
+            return outcome.report, outcome.shape_reuse, elapsed, features
 
+        runner = StagedBatchRunner(
+            process,
+            write,
+            prefetch_depth=self.config.prefetch_depth,
+            write_queue_depth=self.config.write_queue_depth,
+            workers=self.config.compute_workers,
+            read=lambda path: read_image(path, mmap=self.config.memory_lean),
+            summarize=summarize,
+        )
+        # Run in scheduled order but report in input order.
+        summaries = dict(zip(order, runner.run(order)))
+
+        results: list[PipelineResult] = []
+        for image_path in images:
+            report, shape_reuse, elapsed, features = summaries[image_path]
+            planned = schedule.get(image_path)
+            results.append(
+                PipelineResult(
+                    source=image_path,
+                    output=targets[image_path],
+                    report=report,
+                    predicted_seconds=planned.predicted_seconds if planned else None,
+                    elapsed_seconds=elapsed,
+                    shape_reuse=shape_reuse,
+                )
+            )
+            if model is not None and features is not None:
+                model.observe(features, self.config, elapsed)
+
+        if model is not None:
+            model.refit()
+            model.save(self.config.cost_model_path())
         return results
+
+    def run_sequence(self, input_path: Path, animated: bool = False) -> list[PipelineResult]:
+        """Vectorize an animated image or numbered frame directory with temporal coherence.
+
+        Writes one SVG per frame into ``<output_dir>/<name>/``, or with ``animated`` a single
+        SVG that cycles through the frames.
+        """
+        palette = None
+        if self.config.palette_file is not None and self.config.palette_file.is_file():
+            palette = load_palette(self.config.palette_file)
+        vectorizer = SequenceVectorizer(self.config, palette=palette)
+        suffix = self.config.output_suffix()
+        frame_dir = self.config.output_dir / input_path.stem
+
+        results: list[PipelineResult] = []
+        traces = []
+        durations: list[int] = []
+        size = (0, 0)
+        for idx, frame in enumerate(read_frames(input_path, self.config.frame_duration_ms)):
+            started = time.perf_counter()
+            trace, stats = vectorizer.process(frame.image)
+            elapsed = time.perf_counter() - started
+            logger.info(
+                "frame=%d changed=%.0f%% retraced=%d reused=%d layers | %.3fs",
+                idx,
+                stats.changed_fraction * 100,
+                stats.retraced_layers,
+                stats.reused_layers,
+                elapsed,
+            )
+            size = (frame.image.shape[1], frame.image.shape[0])
+            if animated:
+                traces.append(trace)
+                durations.append(frame.duration_ms)
+                continue
+            output_path = frame_dir / f"frame_{idx:04d}{suffix}"
+            write_svg(output_path, build_svg(trace, size, self.config, source=input_path))
+            results.append(PipelineResult(source=input_path, output=output_path, report=None, elapsed_seconds=elapsed))
+
+        if animated and traces:
+            output_path = self.config.output_dir / f"{input_path.stem}{suffix}"
+            write_svg(output_path, build_animated_svg(traces, size, self.config, input_path, durations))
+            results.append(PipelineResult(source=input_path, output=output_path, report=None))
+
+        if self.config.palette_file is not None and palette is None and vectorizer.palette is not None:
+            save_palette(self.config.palette_file, vectorizer.palette)
+        return results
+
+    def shared_palette(self, images: list[Path]) -> SharedPalette:
+        """Load the configured palette file, or learn one from an evenly spaced sample of the batch."""
+        path = self.config.palette_file
+        if path is not None and path.is_file():
+            logger.info("Using shared palette %s", path)
+            return load_palette(path)
+
+        step = max(1, len(images) // self.config.palette_sample_size)
+        sample = images[::step][: self.config.palette_sample_size]
+        logger.info("Learning shared palette from %d of %d images", len(sample), len(images))
+        palette = learn_palette((read_image(p) for p in sample), self.config)
+        if path is not None:
+            save_palette(path, palette)
+        return palette
+
+    def schedule(self, images: list[Path], model: CostModel | None = None) -> list[ScheduledImage]:
+        """Estimate per-image cost and order the batch longest-first."""
+        model = model or CostModel.load(self.config.cost_model_path())
+        ordered = schedule_longest_first(images, self.config, model)
+        logger.info(
+            "Scheduled %d images longest-first | predicted makespan=%.2fs on %d worker(s)",
+            len(ordered),
+            predicted_makespan(ordered, self.config.compute_workers),
+            self.config.compute_workers,
+        )
+        for rank, item in enumerate(ordered, start=1):
+            logger.debug("schedule #%d %s predicted=%.2fs", rank, item.path, item.predicted_seconds)
+        return ordered
+
+    def retrace(
+        self,
+        artifact_path: Path,
+        output_path: Path | None = None,
+        use_recorded_detail: bool = True,
+        use_recorded_simplification: bool = True,
+    ) -> PipelineResult:
+        """Re-run tracing and SVG export from stored intermediates, skipping preprocessing and segmentation.
+
+        By default the detail preset and simplification ratio recorded with the artifacts replace
+        the configured ones, so the SVG is traced as in the original run.
+        """
+        artifacts = load_artifacts(artifact_path)
+        config = self.config
+        if use_recorded_detail and artifacts.detail is not None:
+            config = replace(config, detail=artifacts.detail)
+        if use_recorded_simplification and artifacts.simplification is not None:
+            value = artifacts.simplification
+            config = replace(config, simplification_low=value, simplification_high=value, simplification_ultra=value)
+
+        if output_path is None:
+            stem = artifact_path.name.removesuffix(ARTIFACT_SUFFIX)
+            output_path = config.output_dir / f"{stem}{config.output_suffix()}"
+
+        logger.info("Retracing %s (detail=%s)", artifact_path, config.detail.value)
+        trace = trace_layers(artifacts.segmented, artifacts.edges, artifacts.detail_map, config)
+        svg_text, reuse = build_svg_with_reuse(trace, artifacts.size, config, source=artifacts.source)
+        write_svg(output_path, svg_text)
+        return PipelineResult(
+            source=artifacts.source,
+            output=output_path,
+            report=None,
+            shape_reuse=reuse if config.dedupe_shapes else None,
+        )
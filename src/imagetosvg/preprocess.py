@@ -1,32 +1,220 @@
 from __future__ import annotations
 
+import logging
+import time
+from dataclasses import dataclass, field
+
 import cv2
 import numpy as np
 
 from .config import PipelineConfig
 
+logger = logging.getLogger(__name__)
+
+SHARPEN_KERNEL = np.array([[0, -1, 0], [-1, 5.2, -1], [0, -1, 0]], dtype=np.float32)
+_LOWRES_FACTOR = 2
+_GUIDED_RADIUS = 4
+_GUIDED_SUBSAMPLE = 2
+_UPSAMPLE_RADIUS = 1
+_UPSAMPLE_EPS = 1e-3
+
+
+@dataclass(slots=True)
+class PreprocessResult:
+    """Preprocessing outputs plus the LAB and gray planes computed on the way.
+
+    ``lab`` and ``gray`` cover the processed area (the opaque bounding box when alpha
+    is preserved; zeros elsewhere) and let segmentation skip its own color conversion.
+    For the fast denoisers, ``lab`` holds the enhanced colors before clipping to the sRGB gamut.
+    Arrays may be shared between runs of the same engine and must be treated as read-only.
+    """
+
+    enhanced: np.ndarray
+    edges: np.ndarray
+    detail_map: np.ndarray
+    lab: np.ndarray
+    gray: np.ndarray
+    timings: dict[str, float] = field(default_factory=dict)
+
+    def as_tuple(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return self.enhanced, self.edges, self.detail_map
+
 
 def preprocess_image(image: np.ndarray, config: PipelineConfig) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
-    """Return enhanced image, edge map, and adaptive-threshold detail map."""
-    bgr, alpha = _split_alpha(image)
-
-    denoised = cv2.bilateralFilter(
-        bgr,
-        d=9,
-        sigmaColor=float(config.denoise_sigma),
-        sigmaSpace=float(config.denoise_sigma),
-    )
+    """Return enhanced image, edge map, and adaptive-threshold detail map.
+
+    With ``preserve_alpha``, only the bounding box of the opaque area is processed and
+    the edge and detail maps are cleared wherever the image is fully transparent.
+    """
+    return PreprocessEngine().run(image, config).as_tuple()
+
+
+class PreprocessEngine:
+    """Fused preprocessing that reuses scratch buffers and caches the denoise/contrast stage.
+
+    Denoising, CLAHE and sharpening run once per source image and denoise setting; later
+    runs with other edge/detail parameters (e.g. auto-iteration candidates) only redo
+    Canny and the adaptive threshold. The default ``bilateral`` denoiser keeps the original
+    per-channel sharpening; the fast denoisers sharpen the L plane in LAB space instead,
+    so their LAB output needs no conversion back from BGR.
+    """
+
+    def __init__(self) -> None:
+        self._buffers: dict[str, np.ndarray] = {}
+        self._source: np.ndarray | None = None
+        self._key: tuple | None = None
+        self._base: tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray | None, tuple[slice, slice] | None] | None = None
+
+    def run(self, image: np.ndarray, config: PipelineConfig) -> PreprocessResult:
+        timings: dict[str, float] = {}
+        key = (config.denoiser, config.denoise_sigma, config.preserve_alpha, config.alpha_threshold)
+        if self._base is None or self._source is not image or self._key != key:
+            self._base = self._enhance_base(image, config, timings)
+            self._source, self._key = image, key
+        enhanced, lab, gray, opaque, roi = self._base
+
+        started = time.perf_counter()
+        edges = np.zeros(gray.shape, dtype=np.uint8)
+        detail_map = np.zeros(gray.shape, dtype=np.uint8)
+        if roi is not None:
+            edges[roi], detail_map[roi] = edge_maps(np.ascontiguousarray(gray[roi]), config)
+            if opaque is not None:
+                edges[~opaque] = 0
+                detail_map[~opaque] = 0
+        timings["edges"] = time.perf_counter() - started
+
+        logger.debug("preprocess timings: %s", ", ".join(f"{k}={v * 1000:.1f}ms" for k, v in timings.items()))
+        return PreprocessResult(enhanced, edges, detail_map, lab, gray, timings)
+
+    def _enhance_base(self, image: np.ndarray, config: PipelineConfig, timings: dict[str, float]):
+        bgr, alpha = _split_alpha(image)
+        opaque = opaque_mask(image, config)
+        h, w = bgr.shape[:2]
+
+        x, y, rw, rh = (0, 0, w, h) if opaque is None else mask_bbox(opaque)
+        roi = (slice(y, y + rh), slice(x, x + rw)) if rw > 0 and rh > 0 else None
+
+        if roi is not None and opaque is None:
+            # Copies strided views such as bottom-up memory-mapped BMPs once; contiguous input is used as is.
+            enhanced, lab, gray = self._enhance(np.ascontiguousarray(bgr), config, timings)
+        else:
+            enhanced = bgr.copy()
+            lab = np.zeros((h, w, 3), dtype=np.uint8)
+            gray = np.zeros((h, w), dtype=np.uint8)
+            if roi is not None:
+                enhanced[roi], lab[roi], gray[roi] = self._enhance(np.ascontiguousarray(bgr[roi]), config, timings)
+
+        if alpha is not None and config.preserve_alpha:
+            enhanced = cv2.cvtColor(enhanced, cv2.COLOR_BGR2BGRA)
+            enhanced[:, :, 3] = alpha
+        return enhanced, lab, gray, opaque, roi
+
+    def clear(self, buffers: bool = True) -> None:
+        """Drop the cached base stage and, with ``buffers``, the scratch buffers; the next run recomputes them."""
+        if buffers:
+            self._buffers.clear()
+        self._source = self._key = self._base = None
+
+    def denoise(self, bgr: np.ndarray, config: PipelineConfig) -> np.ndarray:
+        """Denoise a BGR image with the configured denoiser; returns a new array."""
+        return self._denoise(bgr, config).copy()
+
+    def enhance(self, denoised: np.ndarray, config: PipelineConfig) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Contrast-normalize and sharpen an already denoised BGR image; returns ``(enhanced, lab, gray)``."""
+        return self._contrast(denoised, config, {})
 
-    lab = cv2.cvtColor(denoised, cv2.COLOR_BGR2LAB)
-    l, a, b = cv2.split(lab)
-    clahe = cv2.createCLAHE(clipLimit=2.4, tileGridSize=(8, 8))
-    l_norm = clahe.apply(l)
-    enhanced = cv2.cvtColor(cv2.merge([l_norm, a, b]), cv2.COLOR_LAB2BGR)
+    def _enhance(
+        self, bgr: np.ndarray, config: PipelineConfig, timings: dict[str, float]
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        started = time.perf_counter()
+        denoised = self._denoise(bgr, config)
+        timings["denoise"] = time.perf_counter() - started
+        return self._contrast(denoised, config, timings)
 
-    sharpen_kernel = np.array([[0, -1, 0], [-1, 5.2, -1], [0, -1, 0]], dtype=np.float32)
-    sharpened = cv2.filter2D(enhanced, -1, sharpen_kernel)
+    def _contrast(
+        self, denoised: np.ndarray, config: PipelineConfig, timings: dict[str, float]
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        started = time.perf_counter()
+        shape = denoised.shape[:2]
+        lab = cv2.cvtColor(denoised, cv2.COLOR_BGR2LAB)
+        l_plane = cv2.extractChannel(lab, 0, dst=self._buffer("l", shape, np.uint8))
+        l_norm = self._buffer("l_norm", shape, np.uint8)
+        cv2.createCLAHE(clipLimit=2.4, tileGridSize=(8, 8)).apply(l_plane, dst=l_norm)
 
-    gray = cv2.cvtColor(sharpened, cv2.COLOR_BGR2GRAY)
+        if config.denoiser == "bilateral":
+            # The default path keeps the original per-channel BGR sharpening, so its output is
+            # unchanged; its LAB conversion replaces the one segmentation used to do.
+            cv2.insertChannel(l_norm, lab, 0)
+            enhanced = cv2.filter2D(cv2.cvtColor(lab, cv2.COLOR_LAB2BGR), -1, SHARPEN_KERNEL)
+            timings["contrast"] = time.perf_counter() - started
+
+            started = time.perf_counter()
+            lab = cv2.cvtColor(enhanced, cv2.COLOR_BGR2LAB)
+            gray = cv2.cvtColor(enhanced, cv2.COLOR_BGR2GRAY)
+            timings["color"] = time.perf_counter() - started
+            return enhanced, lab, gray
+
+        cv2.filter2D(l_norm, -1, SHARPEN_KERNEL, dst=l_plane)
+        cv2.insertChannel(l_plane, lab, 0)
+        timings["contrast"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        enhanced = cv2.cvtColor(lab, cv2.COLOR_LAB2BGR)
+        gray = cv2.cvtColor(enhanced, cv2.COLOR_BGR2GRAY)
+        timings["color"] = time.perf_counter() - started
+        return enhanced, lab, gray
+
+    def _denoise(self, bgr: np.ndarray, config: PipelineConfig) -> np.ndarray:
+        sigma = float(config.denoise_sigma)
+        h, w = bgr.shape[:2]
+        out = self._buffer("denoised", bgr.shape, np.uint8)
+
+        if config.denoiser == "guided":
+            src = bgr.astype(np.float32) * (1.0 / 255.0)
+            guide = cv2.cvtColor(src, cv2.COLOR_BGR2GRAY)
+            eps = (sigma / 255.0) ** 2
+            filtered = _guided_filter(guide, src, _GUIDED_RADIUS, eps, subsample=_GUIDED_SUBSAMPLE)
+            return _to_uint8(filtered, out)
+
+        if config.denoiser == "bilateral_lowres" and min(h, w) >= 4 * _LOWRES_FACTOR:
+            small = cv2.resize(bgr, (w // _LOWRES_FACTOR, h // _LOWRES_FACTOR), interpolation=cv2.INTER_AREA)
+            small = cv2.bilateralFilter(small, d=5, sigmaColor=sigma, sigmaSpace=sigma / _LOWRES_FACTOR)
+            # Joint (guided) upsampling: fit the filter at low resolution, apply it to the full-size guide.
+            guide = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY).astype(np.float32) * (1.0 / 255.0)
+            filtered = _guided_upsample(guide, small.astype(np.float32) * (1.0 / 255.0), _UPSAMPLE_RADIUS, _UPSAMPLE_EPS)
+            return _to_uint8(filtered, out)
+
+        return cv2.bilateralFilter(bgr, d=9, sigmaColor=sigma, sigmaSpace=sigma, dst=out)
+
+    def _buffer(self, name: str, shape: tuple[int, ...], dtype: type) -> np.ndarray:
+        buf = self._buffers.get(name)
+        if buf is None or buf.shape != shape or buf.dtype != dtype:
+            buf = np.empty(shape, dtype=dtype)
+            self._buffers[name] = buf
+        return buf
+
+
+def denoise_scale(config: PipelineConfig) -> int:
+    """Factor by which the configured denoiser works at reduced resolution; 1 for full-resolution filters."""
+    return {"guided": _GUIDED_SUBSAMPLE, "bilateral_lowres": _LOWRES_FACTOR}.get(config.denoiser, 1)
+
+
+def opaque_mask(image: np.ndarray, config: PipelineConfig) -> np.ndarray | None:
+    """Boolean mask of pixels above ``alpha_threshold``, or None when every pixel counts as opaque."""
+    _, alpha = _split_alpha(image)
+    if alpha is None or not config.preserve_alpha:
+        return None
+    mask = alpha > config.alpha_threshold
+    return None if mask.all() else mask
+
+
+def mask_bbox(mask: np.ndarray) -> tuple[int, int, int, int]:
+    """Return ``(x, y, w, h)`` of the non-zero area; ``w == h == 0`` when the mask is empty."""
+    return cv2.boundingRect(mask.astype(np.uint8))
+
+
+def edge_maps(gray: np.ndarray, config: PipelineConfig) -> tuple[np.ndarray, np.ndarray]:
+    """Return the (dilated) Canny edge map and the adaptive-threshold detail map of ``gray``."""
     edges = cv2.Canny(gray, threshold1=config.canny_low, threshold2=config.canny_high)
     if config.edge_dilate_iterations > 0:
         edges = cv2.dilate(edges, np.ones((2, 2), np.uint8), iterations=config.edge_dilate_iterations)
@@ -39,12 +227,49 @@ def preprocess_image(image: np.ndarray, config: PipelineConfig) -> tuple[np.ndar
         config.adaptive_block_size,
         config.adaptive_c,
     )
+    return edges, detail_map
+
+
+def _guided_filter(guide: np.ndarray, src: np.ndarray, radius: int, eps: float, subsample: int = 1) -> np.ndarray:
+    """He et al. guided filter with a single-channel float guide and a 3-channel float source.
+
+    With ``subsample > 1`` the linear coefficients are fitted at reduced resolution and
+    upsampled (the "fast guided filter"); the output stays at full resolution.
+    """
+    if subsample <= 1:
+        return _guided_upsample(guide, src, radius, eps)
+    h, w = guide.shape[:2]
+    small = (max(1, w // subsample), max(1, h // subsample))
+    return _guided_upsample(guide, cv2.resize(src, small, interpolation=cv2.INTER_AREA), max(1, radius // subsample), eps)
+
+
+def _guided_upsample(guide: np.ndarray, src_small: np.ndarray, radius: int, eps: float) -> np.ndarray:
+    """Fit guided-filter coefficients at ``src_small``'s resolution and apply them to the full ``guide``."""
+    h, w = guide.shape[:2]
+    sh, sw = src_small.shape[:2]
+    guide3 = cv2.merge([guide, guide, guide])
+    guide_s = guide3 if (sh, sw) == (h, w) else cv2.resize(guide3, (sw, sh), interpolation=cv2.INTER_AREA)
+    ksize = (2 * radius + 1, 2 * radius + 1)
+
+    mean_i = cv2.boxFilter(guide_s, -1, ksize)
+    mean_p = cv2.boxFilter(src_small, -1, ksize)
+    var_i = cv2.boxFilter(cv2.multiply(guide_s, guide_s), -1, ksize) - cv2.multiply(mean_i, mean_i)
+    cov_ip = cv2.boxFilter(cv2.multiply(guide_s, src_small), -1, ksize) - cv2.multiply(mean_i, mean_p)
+
+    a = cv2.divide(cov_ip, var_i + eps)
+    b = mean_p - cv2.multiply(a, mean_i)
+    mean_a = cv2.boxFilter(a, -1, ksize)
+    mean_b = cv2.boxFilter(b, -1, ksize)
+    if (sh, sw) != (h, w):
+        mean_a = cv2.resize(mean_a, (w, h), interpolation=cv2.INTER_LINEAR)
+        mean_b = cv2.resize(mean_b, (w, h), interpolation=cv2.INTER_LINEAR)
+    return cv2.add(cv2.multiply(mean_a, guide3), mean_b)
 
-    if alpha is not None and config.preserve_alpha:
-        sharpened = cv2.cvtColor(sharpened, cv2.COLOR_BGR2BGRA)
-        sharpened[:, :, 3] = alpha
 
-    return sharpened, edges, detail_map
+def _to_uint8(filtered: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """Scale a [0, 1] float image to uint8, clamping negatives (``a * I + b`` can undershoot) to 0."""
+    np.maximum(filtered, 0.0, out=filtered)
+    return cv2.convertScaleAbs(filtered, dst=out, alpha=255.0)
 
 
 def _split_alpha(image: np.ndarray) -> tuple[np.ndarray, np.ndarray | None]:
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from .config import DetailPreset, PipelineConfig
+
+logger = logging.getLogger(__name__)
+
+# Seconds per megapixel for (base, edge-weighted, fixed overhead) before any timings are observed.
+DEFAULT_COEFFICIENTS: dict[str, tuple[float, float, float]] = {
+    DetailPreset.LOW.value: (0.6, 1.5, 0.05),
+    DetailPreset.HIGH.value: (1.0, 2.5, 0.08),
+    DetailPreset.ULTRA.value: (1.8, 4.0, 0.12),
+}
+MAX_OBSERVATIONS = 256
+# Edge density assumed when it cannot be estimated without a full decode.
+DEFAULT_EDGE_DENSITY = 0.1
+_THUMBNAIL_SCALE = 8
+
+
+@dataclass(slots=True)
+class ImageCostFeatures:
+    megapixels: float
+    edge_density: float
+
+
+@dataclass(slots=True)
+class ScheduledImage:
+    path: Path
+    features: ImageCostFeatures
+    predicted_seconds: float
+
+
+@dataclass(slots=True)
+class CostModel:
+    """Per-preset linear cost model: ``seconds = a * mpx + b * mpx * edge_density + c``."""
+
+    coefficients: dict[str, tuple[float, float, float]] = field(default_factory=lambda: dict(DEFAULT_COEFFICIENTS))
+    observations: dict[str, list[tuple[float, float, float]]] = field(default_factory=dict)
+
+    def predict(self, features: ImageCostFeatures, config: PipelineConfig) -> float:
+        a, b, c = self.coefficients.get(config.detail.value, DEFAULT_COEFFICIENTS[config.detail.value])
+        mpx = features.megapixels
+        return max(0.0, a * mpx + b * mpx * features.edge_density + c) * _candidate_factor(config)
+
+    def observe(self, features: ImageCostFeatures, config: PipelineConfig, seconds: float) -> None:
+        rows = self.observations.setdefault(config.detail.value, [])
+        rows.append((features.megapixels, features.edge_density, seconds / _candidate_factor(config)))
+        del rows[:-MAX_OBSERVATIONS]
+
+    def refit(self) -> None:
+        for preset, rows in self.observations.items():
+            if not rows:
+                continue
+            data = np.array(rows, dtype=np.float64)
+            mpx, density, seconds = data[:, 0], data[:, 1], data[:, 2]
+            design = np.stack([mpx, mpx * density, np.ones_like(mpx)], axis=1)
+
+            if len(rows) >= 3 and np.linalg.matrix_rank(design) == 3:
+                coeffs, *_ = np.linalg.lstsq(design, seconds, rcond=None)
+                self.coefficients[preset] = tuple(float(max(0.0, v)) for v in coeffs)
+                continue
+
+            base = np.array(DEFAULT_COEFFICIENTS.get(preset, DEFAULT_COEFFICIENTS[DetailPreset.HIGH.value]))
+            predicted = design @ base
+            scale = float(np.median(seconds / np.maximum(predicted, 1e-6)))
+            self.coefficients[preset] = tuple(float(v) for v in base * scale)
+
+    @classmethod
+    def load(cls, path: Path) -> CostModel:
+        if not path.is_file():
+            return cls()
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            if not isinstance(data, dict):
+                raise ValueError("cost model must be a JSON object")
+            coefficients = {str(k): _triple(v) for k, v in dict(data.get("coefficients", {})).items()}
+            observations = {str(k): [_triple(r) for r in v] for k, v in dict(data.get("observations", {})).items()}
+        except (OSError, TypeError, ValueError):
+            logger.warning("Ignoring unreadable cost model %s", path)
+            return cls()
+        model = cls()
+        model.coefficients.update(coefficients)
+        model.observations = observations
+        return model
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"coefficients": self.coefficients, "observations": self.observations}
+        path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+
+def estimate_features(path: Path, config: PipelineConfig) -> ImageCostFeatures:
+    """Estimate cost features without decoding the full image.
+
+    The pixel count comes from the file header. Edge density is measured on a reduced
+    JPEG draft decode; other formats cannot be decoded at reduced size, so they use
+    ``DEFAULT_EDGE_DENSITY`` and get their measured value from ``measure_features``.
+    """
+    from PIL import Image
+
+    try:
+        with Image.open(path) as img:
+            w, h = img.size
+            density = DEFAULT_EDGE_DENSITY
+            if img.format == "JPEG":
+                img.draft("L", (max(1, w // _THUMBNAIL_SCALE), max(1, h // _THUMBNAIL_SCALE)))
+                density = _edge_density(np.asarray(img.convert("L")), config)
+    except (OSError, ValueError):
+        return ImageCostFeatures(megapixels=0.0, edge_density=0.0)
+    return ImageCostFeatures(megapixels=w * h / 1e6, edge_density=density)
+
+
+def measure_features(image: np.ndarray, config: PipelineConfig) -> ImageCostFeatures:
+    """Exact cost features of an already decoded image, using a 1/8-scale proxy for edge density."""
+    h, w = image.shape[:2]
+    proxy = cv2.resize(
+        image,
+        (max(1, w // _THUMBNAIL_SCALE), max(1, h // _THUMBNAIL_SCALE)),
+        interpolation=cv2.INTER_AREA,
+    )
+    if proxy.ndim == 3:
+        proxy = cv2.cvtColor(proxy, cv2.COLOR_BGRA2GRAY if proxy.shape[2] == 4 else cv2.COLOR_BGR2GRAY)
+    return ImageCostFeatures(megapixels=h * w / 1e6, edge_density=_edge_density(proxy, config))
+
+
+def _edge_density(gray: np.ndarray, config: PipelineConfig) -> float:
+    edges = cv2.Canny(gray, threshold1=config.canny_low, threshold2=config.canny_high)
+    return float(np.count_nonzero(edges)) / max(1, edges.size)
+
+
+def schedule_longest_first(paths: list[Path], config: PipelineConfig, model: CostModel) -> list[ScheduledImage]:
+    """Order images by predicted cost, largest first (LPT), to shorten the tail of parallel batches."""
+    scheduled = []
+    for path in paths:
+        features = estimate_features(path, config)
+        scheduled.append(ScheduledImage(path=path, features=features, predicted_seconds=model.predict(features, config)))
+    return sorted(scheduled, key=lambda item: item.predicted_seconds, reverse=True)
+
+
+def predicted_makespan(schedule: list[ScheduledImage], workers: int) -> float:
+    loads = [0.0] * max(1, workers)
+    for item in schedule:
+        idx = loads.index(min(loads))
+        loads[idx] += item.predicted_seconds
+    return max(loads)
+
+
+def _triple(values) -> tuple[float, float, float]:
+    a, b, c = (float(v) for v in values)
+    return a, b, c
+
+
+def _candidate_factor(config: PipelineConfig) -> float:
+    # Auto-iteration may render up to three candidates; assume the average run needs two.
+    return 2.0 if config.auto_iterate and config.validate_similarity else 1.0
@@ -6,66 +6,181 @@ import cv2
 import numpy as np
 
 from .config import PipelineConfig
+from .palette import SharedPalette
+from .preprocess import mask_bbox, opaque_mask
+
+TRANSPARENT_LABEL = -1
+_LEAN_SAMPLE_PIXELS = 200_000
+_ASSIGN_CHUNK = 1 << 14
 
 
 @dataclass(slots=True)
 class SegmentationResult:
-    quantized: np.ndarray
     palette: np.ndarray
     labels: np.ndarray
 
+    @property
+    def quantized(self) -> np.ndarray:
+        """Flat-color rendering of ``labels``; computed on access, not stored."""
+        return render_labels(self.labels, self.palette)
+
+
+def segment_colors(
+    image: np.ndarray,
+    config: PipelineConfig,
+    palette: SharedPalette | None = None,
+    lab: np.ndarray | None = None,
+) -> SegmentationResult:
+    """Segment into color regions; with a shared ``palette``, per-image clustering is skipped.
 
-def segment_colors(image: np.ndarray, config: PipelineConfig) -> SegmentationResult:
+    Fully transparent pixels (see ``PipelineConfig.alpha_threshold``) get ``TRANSPARENT_LABEL``
+    and are excluded from superpixels, clustering and region merging. ``lab`` may carry the
+    LAB planes already computed by preprocessing to avoid converting the image again.
+    """
     bgr = image[:, :, :3] if image.shape[2] == 4 else image
-    lab = cv2.cvtColor(bgr, cv2.COLOR_BGR2LAB)
+    opaque = opaque_mask(image, config)
+    dtype = label_dtype(len(palette.colors_bgr) if palette is not None else config.max_colors()) if config.memory_lean else np.int32
+    labels = np.full(bgr.shape[:2], TRANSPARENT_LABEL, dtype=dtype)
+
+    x, y, w, h = (0, 0, bgr.shape[1], bgr.shape[0]) if opaque is None else mask_bbox(opaque)
+    if w > 0 and h > 0:
+        roi = (slice(y, y + h), slice(x, x + w))
+        mask = None if opaque is None else opaque[roi]
+        lab_roi = None if lab is None else np.ascontiguousarray(lab[roi])
+        labels[roi] = _segment_region(np.ascontiguousarray(bgr[roi]), mask, config, palette, lab_roi)
+
+    if palette is not None:
+        colors = palette.colors_bgr
+    else:
+        colors = _labels_to_palette(labels, bgr)
+    return SegmentationResult(palette=colors, labels=labels)
+
+
+def label_dtype(count: int) -> np.dtype:
+    """Smallest signed integer type holding label ids ``0..count-1`` and ``TRANSPARENT_LABEL``."""
+    for dtype in (np.int8, np.int16):
+        if count <= np.iinfo(dtype).max + 1:
+            return np.dtype(dtype)
+    return np.dtype(np.int32)
+
+
+def compact_labels(labels: np.ndarray) -> np.ndarray:
+    """Return ``labels`` in the smallest dtype that holds its largest id."""
+    dtype = label_dtype(int(labels.max()) + 1 if labels.size else 1)
+    return labels if labels.dtype == dtype else labels.astype(dtype)
+
+
+def render_labels(labels: np.ndarray, palette: np.ndarray) -> np.ndarray:
+    """Paint each label with its palette color; transparent pixels stay black."""
+    quantized = np.zeros((*labels.shape, 3), dtype=np.uint8)
+    valid = labels >= 0
+    quantized[valid] = palette[labels[valid]]
+    return quantized
+
+
+def _segment_region(
+    bgr: np.ndarray,
+    mask: np.ndarray | None,
+    config: PipelineConfig,
+    palette: SharedPalette | None,
+    lab: np.ndarray | None = None,
+) -> np.ndarray:
+    if lab is None:
+        lab = cv2.cvtColor(bgr, cv2.COLOR_BGR2LAB)
+    lean = config.memory_lean
 
     if config.use_slic:
-        labels_slic = _slic_labels(lab, config.slic_segments(), config.slic_compactness)
+        n_segments = config.slic_segments()
+        if mask is not None:
+            # Keep superpixel size constant: spend segments only on the opaque share of the frame.
+            n_segments = max(8, int(round(n_segments * np.count_nonzero(mask) / mask.size)))
+        labels_slic = _slic_labels(lab, n_segments, config.slic_compactness, mask, lean=lean)
         merged = _merge_small_superpixels(labels_slic, bgr, config.min_region_area)
-        reduced = _quantize_superpixels(merged, bgr, config.max_colors())
+        del labels_slic
+        if palette is not None:
+            reduced = _assign_superpixels_to_palette(merged, lab, palette)
+        else:
+            reduced = _quantize_superpixels(merged, bgr, config.max_colors())
+        del merged
+    elif palette is not None:
+        reduced = palette.assign(lab)
+        if mask is not None:
+            reduced[~mask] = TRANSPARENT_LABEL
     else:
-        reduced = _kmeans_labels(lab, config.max_colors())
+        reduced = _kmeans_labels(lab, config.max_colors(), mask, lean=lean)
+
+    if lean:
+        reduced = compact_labels(reduced)
 
-    reduced = _merge_tiny_label_regions(reduced, bgr, config.min_region_area)
-    palette, quantized = _labels_to_palette_image(reduced, bgr)
-    return SegmentationResult(quantized=quantized, palette=palette, labels=reduced)
+    return _merge_tiny_label_regions(reduced, bgr, config.min_region_area)
 
 
-def _slic_labels(lab_img: np.ndarray, n_segments: int, compactness: float) -> np.ndarray:
+def _slic_labels(
+    lab_img: np.ndarray, n_segments: int, compactness: float, mask: np.ndarray | None = None, lean: bool = False
+) -> np.ndarray:
     try:
         from skimage.segmentation import slic
     except Exception:
-        return _kmeans_labels(lab_img, max(8, n_segments // 8))
+        return _kmeans_labels(lab_img, max(8, n_segments // 8), mask, lean=lean)
 
     labels = slic(
         lab_img,
         n_segments=n_segments,
         compactness=compactness,
-        start_label=0,
+        start_label=0 if mask is None else 1,
         convert2lab=False,
         channel_axis=-1,
+        mask=mask,
     )
-    return labels.astype(np.int32)
+    labels = compact_labels(labels) if lean else labels.astype(np.int32)
+    if mask is not None:
+        labels[~mask] = TRANSPARENT_LABEL
+    return labels
+
 
+def _kmeans_labels(lab_img: np.ndarray, num_colors: int, mask: np.ndarray | None = None, lean: bool = False) -> np.ndarray:
+    """KMeans over LAB pixels; ``lean`` fits on a strided sample and assigns all pixels in chunks."""
+    source = lab_img.reshape((-1, 3)) if mask is None else lab_img[mask]
+    labels = np.full(lab_img.shape[:2], TRANSPARENT_LABEL, dtype=label_dtype(num_colors) if lean else np.int32)
+    if len(source) == 0:
+        return labels
 
-def _kmeans_labels(lab_img: np.ndarray, num_colors: int) -> np.ndarray:
-    pixels = lab_img.reshape((-1, 3)).astype(np.float32)
+    sampled = lean and len(source) > _LEAN_SAMPLE_PIXELS
+    pixels = (source[:: -(-len(source) // _LEAN_SAMPLE_PIXELS)] if sampled else source).astype(np.float32)
     k = max(1, min(num_colors, len(pixels), int(np.unique(pixels, axis=0).shape[0])))
     criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 120, 0.2)
-    _, labels, _ = cv2.kmeans(pixels, k, None, criteria, attempts=4, flags=cv2.KMEANS_PP_CENTERS)
-    return labels.flatten().reshape(lab_img.shape[:2]).astype(np.int32)
+    _, assigned, centers = cv2.kmeans(pixels, k, None, criteria, attempts=4, flags=cv2.KMEANS_PP_CENTERS)
+    del pixels
+    assigned = _nearest_center(source, centers, labels.dtype) if sampled else assigned.flatten()
+
+    if mask is None:
+        return assigned.reshape(lab_img.shape[:2]).astype(labels.dtype, copy=False)
+    labels[mask] = assigned
+    return labels
+
+
+def _nearest_center(pixels: np.ndarray, centers: np.ndarray, dtype: np.dtype) -> np.ndarray:
+    """Index of the closest center for each pixel, computed in fixed-size float32 chunks."""
+    out = np.empty(len(pixels), dtype=dtype)
+    centers = centers.astype(np.float32)
+    center_norms = (centers * centers).sum(axis=1)
+    for start in range(0, len(pixels), _ASSIGN_CHUNK):
+        chunk = pixels[start : start + _ASSIGN_CHUNK].astype(np.float32)
+        # argmin of |x - c|^2 == argmin of |c|^2 - 2 x.c; the |x|^2 term is constant per pixel.
+        out[start : start + len(chunk)] = (center_norms - 2.0 * chunk @ centers.T).argmin(axis=1)
+    return out
 
 
 def _merge_small_superpixels(labels: np.ndarray, bgr: np.ndarray, min_area: int) -> np.ndarray:
     merged = labels.copy()
     ids, counts = np.unique(merged, return_counts=True)
     for sid, cnt in zip(ids.tolist(), counts.tolist()):
-        if cnt >= min_area:
+        if cnt >= min_area or sid < 0:
             continue
         mask = (merged == sid).astype(np.uint8)
         dilated = cv2.dilate(mask, np.ones((3, 3), np.uint8), iterations=1)
         neighbor_ids = merged[dilated.astype(bool)]
-        neighbor_ids = neighbor_ids[neighbor_ids != sid]
+        neighbor_ids = neighbor_ids[(neighbor_ids != sid) & (neighbor_ids >= 0)]
         if neighbor_ids.size == 0:
             continue
         target = int(np.bincount(neighbor_ids).argmax())
@@ -76,6 +191,11 @@ def _merge_small_superpixels(labels: np.ndarray, bgr: np.ndarray, min_area: int)
 def _quantize_superpixels(labels: np.ndarray, bgr: np.ndarray, max_colors: int) -> np.ndarray:
     h, w = labels.shape
     unique_ids = np.unique(labels)
+    unique_ids = unique_ids[unique_ids >= 0]
+    reduced = np.full((h, w), TRANSPARENT_LABEL, dtype=np.int32)
+    if unique_ids.size == 0:
+        return reduced
+
     means = []
     for sid in unique_ids:
         px = bgr[labels == sid]
@@ -87,35 +207,45 @@ def _quantize_superpixels(labels: np.ndarray, bgr: np.ndarray, max_colors: int)
     _, lbl, centers = cv2.kmeans(means_arr, k, None, criteria, attempts=3, flags=cv2.KMEANS_PP_CENTERS)
 
     label_map = {int(sid): int(cluster) for sid, cluster in zip(unique_ids.tolist(), lbl.flatten().tolist())}
-    reduced = np.zeros((h, w), dtype=np.int32)
     for sid in unique_ids:
         reduced[labels == sid] = label_map[int(sid)]
     return reduced
 
 
+def _assign_superpixels_to_palette(labels: np.ndarray, lab: np.ndarray, palette: SharedPalette) -> np.ndarray:
+    valid = labels >= 0
+    flat = labels[valid]
+    reduced = np.full(labels.shape, TRANSPARENT_LABEL, dtype=np.int32)
+    if flat.size == 0:
+        return reduced
+    counts = np.bincount(flat)
+    sums = np.stack([np.bincount(flat, weights=lab[:, :, c][valid], minlength=counts.size) for c in range(3)], axis=1)
+    means = np.clip(np.rint(sums / np.maximum(counts, 1)[:, None]), 0, 255).astype(np.uint8)
+    reduced[valid] = palette.assign(means)[flat]
+    return reduced
+
+
 def _merge_tiny_label_regions(labels: np.ndarray, bgr: np.ndarray, min_area: int) -> np.ndarray:
     merged = labels.copy()
     ids, counts = np.unique(merged, return_counts=True)
     for lid, cnt in zip(ids.tolist(), counts.tolist()):
-        if cnt >= min_area:
+        if cnt >= min_area or lid < 0:
             continue
         mask = (merged == lid).astype(np.uint8)
         border = cv2.dilate(mask, np.ones((3, 3), np.uint8), iterations=1) - mask
         neighbors = merged[border.astype(bool)]
-        neighbors = neighbors[neighbors != lid]
+        neighbors = neighbors[(neighbors != lid) & (neighbors >= 0)]
         if neighbors.size == 0:
             continue
         merged[merged == lid] = int(np.bincount(neighbors).argmax())
     return merged
 
 
-def _labels_to_palette_image(labels: np.ndarray, bgr: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+def _labels_to_palette(labels: np.ndarray, bgr: np.ndarray) -> np.ndarray:
     ids = np.unique(labels)
-    palette = np.zeros((int(ids.max()) + 1, 3), dtype=np.uint8)
-    quantized = np.zeros_like(bgr)
+    ids = ids[ids >= 0]
+    palette = np.zeros((int(ids.max()) + 1 if ids.size else 1, 3), dtype=np.uint8)
     for lid in ids:
         pixels = bgr[labels == lid]
-        color = np.clip(np.median(pixels, axis=0), 0, 255).astype(np.uint8)
-        palette[int(lid)] = color
-        quantized[labels == lid] = color
-    return palette, quantized
+        palette[int(lid)] = np.clip(np.median(pixels, axis=0), 0, 255).astype(np.uint8)
+    return palette
@@ -1,15 +1,97 @@
 from __future__ import annotations
 
+import logging
+from dataclasses import dataclass, field
 from datetime import UTC, datetime
 from pathlib import Path
 
 import svgwrite
 
 from .config import PipelineConfig
-from .tracing import TraceResult
+from .tracing import PathLayer, TraceResult
+
+logger = logging.getLogger(__name__)
+
+MIN_SHAPE_REPEATS = 2
+# Extra bytes of "<defs>...</defs>" over the empty "<defs />" svgwrite always emits.
+_DEFS_OVERHEAD = len("<defs></defs>") - len("<defs />")
+
+
+@dataclass(slots=True)
+class ShapeReusePlan:
+    """Repeated path geometry (equal up to translation) to emit once as ``<symbol>``.
+
+    ``bytes_saved`` is the exact size reduction of the serialized SVG versus inline paths.
+    """
+
+    placements: dict[tuple[int, int], tuple[str, float, float]] = field(default_factory=dict)
+    symbols: dict[str, str] = field(default_factory=dict)
+    paths_replaced: int = 0
+    bytes_saved: int = 0
 
 
 def build_svg(trace: TraceResult, size: tuple[int, int], config: PipelineConfig, source: Path) -> str:
+    return build_svg_with_reuse(trace, size, config, source)[0]
+
+
+def build_svg_with_reuse(
+    trace: TraceResult, size: tuple[int, int], config: PipelineConfig, source: Path
+) -> tuple[str, ShapeReusePlan]:
+    """Like ``build_svg``, also returning the shape reuse plan (empty unless ``dedupe_shapes``)."""
+    dwg = _new_drawing(size, config, source)
+    plan = _add_symbols(dwg, trace, config)
+    _add_layers(dwg, dwg, trace.layers, plan)
+    return dwg.tostring(), plan
+
+
+def build_animated_svg(
+    frames: list[TraceResult],
+    size: tuple[int, int],
+    config: PipelineConfig,
+    source: Path,
+    durations_ms: list[int],
+) -> str:
+    """Emit one SVG whose frame groups are shown in turn by a looping discrete SMIL animation.
+
+    The first frame is visible without animation support. With ``dedupe_shapes``, paths that
+    repeat across frames (e.g. unchanged regions) are stored once.
+    """
+    dwg = _new_drawing(size, config, source)
+    combined = TraceResult(layers=[layer for trace in frames for layer in trace.layers])
+    plan = _add_symbols(dwg, combined, config)
+
+    total = max(1, sum(durations_ms))
+    start = 0
+    index_offset = 0
+    for idx, (trace, duration) in enumerate(zip(frames, durations_ms)):
+        frame = dwg.g(id=f"frame_{idx:04d}", visibility="visible" if idx == 0 else "hidden")
+        begin, end = start / total, (start + duration) / total
+        if begin > 0 or end < 1:
+            if begin == 0:
+                values, key_times = ["visible", "hidden"], [0.0, end]
+            elif end >= 1:
+                values, key_times = ["hidden", "visible"], [0.0, begin]
+            else:
+                values, key_times = ["hidden", "visible", "hidden"], [0.0, begin, end]
+            frame.add(
+                dwg.animate(
+                    attributeName="visibility",
+                    values=";".join(values),
+                    keyTimes=";".join(f"{t:.6g}" for t in key_times),
+                    dur=f"{total / 1000:g}s",
+                    calcMode="discrete",
+                    repeatCount="indefinite",
+                )
+            )
+        _add_layers(dwg, frame, trace.layers, plan, index_offset=index_offset, id_prefix=f"f{idx:04d}_")
+        dwg.add(frame)
+        start += duration
+        index_offset += len(trace.layers)
+
+    return dwg.tostring()
+
+
+def _new_drawing(size: tuple[int, int], config: PipelineConfig, source: Path) -> svgwrite.Drawing:
     width, height = size
     dwg = svgwrite.Drawing(size=(width, height), profile="full")
     dwg.viewbox(0, 0, width, height)
@@ -19,23 +101,146 @@ def build_svg(trace: TraceResult, size: tuple[int, int], config: PipelineConfig,
             f"Generated by Imagetosvg pipeline | detail={config.detail.value} | "
             f"source={source.name} | timestamp={datetime.now(UTC).isoformat()}"
         )
-        dwg.add(dwg.metadata(meta))
-
-    for layer in trace.layers:
-        group = dwg.g(id=layer.name, opacity=layer.opacity)
-        for d in layer.paths:
-            path_kwargs = {
-                "d": d,
-                "fill": layer.fill or "none",
-                "fill_rule": "evenodd",
-                "shape_rendering": "geometricPrecision",
-            }
-            if layer.stroke:
-                path_kwargs["stroke"] = layer.stroke
-                path_kwargs["stroke_width"] = layer.stroke_width or 0.35
-                path_kwargs["stroke_linejoin"] = "round"
-                path_kwargs["stroke_linecap"] = "round"
-            group.add(dwg.path(**path_kwargs))
-        dwg.add(group)
+        dwg.set_desc(desc=meta)
+    return dwg
 
-    return dwg.tostring()
+
+def _add_symbols(dwg: svgwrite.Drawing, trace: TraceResult, config: PipelineConfig) -> ShapeReusePlan:
+    plan = plan_shape_reuse(trace) if config.dedupe_shapes else ShapeReusePlan()
+    for symbol_id, d in plan.symbols.items():
+        symbol = dwg.symbol(id=symbol_id, overflow="visible")
+        symbol.add(dwg.path(d=d, fill_rule="evenodd", shape_rendering="geometricPrecision"))
+        dwg.defs.add(symbol)
+    if plan.symbols:
+        logger.info(
+            "Shape reuse: %d paths -> %d symbols | ~%d bytes saved",
+            plan.paths_replaced,
+            len(plan.symbols),
+            plan.bytes_saved,
+        )
+    return plan
+
+
+def _add_layers(
+    dwg: svgwrite.Drawing,
+    parent,
+    layers: list[PathLayer],
+    plan: ShapeReusePlan,
+    index_offset: int = 0,
+    id_prefix: str = "",
+) -> None:
+    for layer_idx, layer in enumerate(layers, start=index_offset):
+        group = dwg.g(id=f"{id_prefix}{layer.name}", opacity=layer.opacity)
+        style = _layer_style(layer)
+        for path_idx, d in enumerate(layer.paths):
+            placement = plan.placements.get((layer_idx, path_idx))
+            if placement is not None:
+                symbol_id, x, y = placement
+                group.add(dwg.use(f"#{symbol_id}", insert=(x, y), **style))
+                continue
+            group.add(dwg.path(d=d, fill_rule="evenodd", shape_rendering="geometricPrecision", **style))
+        parent.add(group)
+
+
+def plan_shape_reuse(trace: TraceResult, min_repeats: int = MIN_SHAPE_REPEATS) -> ShapeReusePlan:
+    """Find paths that are identical up to translation and assign them shared symbols.
+
+    A shape only becomes a symbol when the ``<symbol>`` plus its ``<use>`` elements are
+    smaller than the inline paths they replace.
+    """
+    groups: dict[str, list[tuple[tuple[int, int], float, float]]] = {}
+    for layer_idx, layer in enumerate(trace.layers):
+        for path_idx, d in enumerate(layer.paths):
+            parsed = _canonicalize_path(d)
+            if parsed is not None:
+                key, x, y = parsed
+                groups.setdefault(key, []).append(((layer_idx, path_idx), x, y))
+
+    plan = ShapeReusePlan()
+    for key, members in groups.items():
+        if len(members) < min_repeats:
+            continue
+        symbol_id = f"shape_{len(plan.symbols):04d}"
+        saving = -_symbol_bytes(symbol_id, key)
+        for (layer_idx, path_idx), x, y in members:
+            saving += _path_bytes(trace.layers[layer_idx].paths[path_idx]) - _use_bytes(symbol_id, x, y)
+        if saving <= 0:
+            continue
+        plan.symbols[symbol_id] = key
+        for index, x, y in members:
+            plan.placements[index] = (symbol_id, x, y)
+        plan.paths_replaced += len(members)
+        plan.bytes_saved += saving
+
+    if plan.symbols:
+        plan.bytes_saved -= _DEFS_OVERHEAD
+        if plan.bytes_saved <= 0:
+            return ShapeReusePlan()
+    return plan
+
+
+# Serialized sizes, excluding the style attributes a path and its <use> share.
+def _path_bytes(d: str) -> int:
+    return len(f'<path d="{d}" fill-rule="evenodd" shape-rendering="geometricPrecision" />')
+
+
+def _use_bytes(symbol_id: str, x: float, y: float) -> int:
+    return len(f'<use x="{_fmt(x)}" xlink:href="#{symbol_id}" y="{_fmt(y)}" />')
+
+
+def _symbol_bytes(symbol_id: str, d: str) -> int:
+    return len(f'<symbol id="{symbol_id}" overflow="visible"></symbol>') + _path_bytes(d)
+
+
+def _canonicalize_path(d: str) -> tuple[str, float, float] | None:
+    tokens = d.split()
+    points: list[tuple[float, float]] = []
+    commands: list[str | None] = []
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token.isalpha():
+            commands.append(token)
+            i += 1
+            continue
+        if i + 1 >= len(tokens):
+            return None
+        try:
+            points.append((_number(token), _number(tokens[i + 1])))
+        except ValueError:
+            return None
+        commands.append(None)
+        i += 2
+    if not points:
+        return None
+
+    ox = min(p[0] for p in points)
+    oy = min(p[1] for p in points)
+    out: list[str] = []
+    point_iter = iter(points)
+    for cmd in commands:
+        if cmd is not None:
+            out.append(cmd)
+        else:
+            px, py = next(point_iter)
+            out.append(f"{_fmt(px - ox)} {_fmt(py - oy)}")
+    return " ".join(out), ox, oy
+
+
+def _layer_style(layer: PathLayer) -> dict[str, object]:
+    style: dict[str, object] = {"fill": layer.fill or "none"}
+    if layer.stroke:
+        style["stroke"] = layer.stroke
+        style["stroke_width"] = layer.stroke_width or 0.35
+        style["stroke_linejoin"] = "round"
+        style["stroke_linecap"] = "round"
+    return style
+
+
+def _number(token: str) -> float:
+    value = float(token)
+    return int(value) if value.is_integer() else value
+
+
+def _fmt(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else f"{value:g}"
@@ -6,6 +6,7 @@ import cv2
 import numpy as np
 
 from .config import DetailPreset, PipelineConfig
+from .preprocess import mask_bbox
 from .segmentation import SegmentationResult
 
 
@@ -17,6 +18,7 @@ class PathLayer:
     stroke: str | None = None
     stroke_width: float | None = None
     opacity: float = 1.0
+    label: int | None = None
 
 
 @dataclass(slots=True)
@@ -29,18 +31,34 @@ def trace_layers(
     edges: np.ndarray,
     detail_map: np.ndarray,
     config: PipelineConfig,
+    reuse: dict[int, PathLayer | None] | None = None,
 ) -> TraceResult:
+    """Trace color regions and stroke maps into SVG path layers.
+
+    ``reuse`` maps label ids whose mask is known to be unchanged to their previously
+    traced layer (or None if it produced no paths); those labels are not re-traced.
+    """
     layers: list[PathLayer] = []
 
-    label_ids, counts = np.unique(segmented.labels, return_counts=True)
+    # Only the bounding box of labelled (non-transparent) pixels can produce paths.
+    x, y, w, h = mask_bbox(segmented.labels >= 0)
+    roi = (slice(y, y + h), slice(x, x + w))
+    offset = (x, y)
+    labels = segmented.labels[roi]
+
+    label_ids, counts = np.unique(labels, return_counts=True)
     color_items = sorted(zip(label_ids.tolist(), counts.tolist()), key=lambda t: t[1], reverse=True)
 
     for label_id, pixel_count in color_items:
-        if pixel_count < config.min_region_area:
+        if pixel_count < config.min_region_area or label_id < 0:
             continue
-        mask = np.where(segmented.labels == label_id, 255, 0).astype(np.uint8)
+        if reuse is not None and label_id in reuse:
+            if reuse[label_id] is not None:
+                layers.append(reuse[label_id])
+            continue
+        mask = np.equal(labels, label_id).view(np.uint8)
         color = segmented.palette[label_id]
-        paths = _contours_to_svg_paths(mask, config.simplification_ratio(), min_area=config.min_region_area)
+        paths = _contours_to_svg_paths(mask, config.simplification_ratio(), min_area=config.min_region_area, offset=offset)
         if not paths:
             continue
         layers.append(
@@ -48,10 +66,15 @@ def trace_layers(
                 name=f"color_{int(label_id):03d}",
                 paths=paths,
                 fill=f"rgb({int(color[2])},{int(color[1])},{int(color[0])})",
+                label=int(label_id),
             )
         )
 
-    edge_paths = _contours_to_svg_paths(edges, config.simplification_ratio() * 0.6, min_area=10)
+    edge_paths = (
+        _contours_to_svg_paths(edges[roi], config.simplification_ratio() * 0.6, min_area=10, offset=offset)
+        if config.include_edge_layer
+        else []
+    )
     if edge_paths:
         layers.append(
             PathLayer(
@@ -64,7 +87,11 @@ def trace_layers(
             )
         )
 
-    detail_paths = _contours_to_svg_paths(detail_map, config.simplification_ratio() * 0.45, min_area=6)
+    detail_paths = (
+        _contours_to_svg_paths(detail_map[roi], config.simplification_ratio() * 0.45, min_area=6, offset=offset)
+        if config.include_detail_layer
+        else []
+    )
     if detail_paths:
         layers.append(
             PathLayer(
@@ -80,8 +107,12 @@ def trace_layers(
     return TraceResult(layers=layers)
 
 
-def _contours_to_svg_paths(mask: np.ndarray, simplification: float, min_area: int) -> list[str]:
-    contours, hierarchy = cv2.findContours(mask, cv2.RETR_CCOMP, cv2.CHAIN_APPROX_NONE)
+def _contours_to_svg_paths(
+    mask: np.ndarray, simplification: float, min_area: int, offset: tuple[int, int] = (0, 0)
+) -> list[str]:
+    if mask.size == 0:
+        return []
+    contours, hierarchy = cv2.findContours(mask, cv2.RETR_CCOMP, cv2.CHAIN_APPROX_NONE, offset=offset)
     if hierarchy is None:
         return []
 
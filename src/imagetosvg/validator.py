@@ -7,6 +7,8 @@ import cv2
 import numpy as np
 from skimage.metrics import structural_similarity as ssim
 
+from .io import read_svg
+
 
 @dataclass(slots=True)
 class ValidationReport:
@@ -15,25 +17,41 @@ class ValidationReport:
 
 
 def validate_similarity(original: np.ndarray, svg_path: Path) -> ValidationReport | None:
+    return validate_svg_text(original, read_svg(svg_path))
+
+
+def validate_svg_text(original: np.ndarray, svg_text: str) -> ValidationReport | None:
+    """Render SVG markup in memory and score it against the original image."""
     try:
         import cairosvg
     except Exception:
         return None
 
     try:
-        png_bytes = cairosvg.svg2png(url=str(svg_path))
+        png_bytes = cairosvg.svg2png(bytestring=svg_text.encode("utf-8"))
     except Exception:
         return None
 
-    raster = cv2.imdecode(np.frombuffer(png_bytes, np.uint8), cv2.IMREAD_COLOR)
+    raster = cv2.imdecode(np.frombuffer(png_bytes, np.uint8), cv2.IMREAD_UNCHANGED)
     if raster is None:
         return None
+    raster = _over_black(raster)
 
-    orig_bgr = original[:, :, :3] if original.ndim == 3 and original.shape[2] == 4 else original
+    orig_bgr = _over_black(original)
     raster_resized = cv2.resize(raster, (orig_bgr.shape[1], orig_bgr.shape[0]), interpolation=cv2.INTER_AREA)
 
     orig_gray = cv2.cvtColor(orig_bgr, cv2.COLOR_BGR2GRAY)
     rast_gray = cv2.cvtColor(raster_resized, cv2.COLOR_BGR2GRAY)
     score = float(ssim(orig_gray, rast_gray, data_range=255))
-    mse_value = float(np.mean((orig_bgr.astype(np.float32) - raster_resized.astype(np.float32)) ** 2))
+    mse_value = float(cv2.norm(orig_bgr, raster_resized, cv2.NORM_L2SQR)) / orig_bgr.size
     return ValidationReport(ssim=score, mse=mse_value)
+
+
+def _over_black(image: np.ndarray) -> np.ndarray:
+    """Composite BGRA onto black so transparent areas compare equal regardless of hidden color values."""
+    if image.ndim == 3 and image.shape[2] == 4:
+        alpha = image[:, :, 3:4].astype(np.uint16)
+        return (image[:, :, :3].astype(np.uint16) * alpha // 255).astype(np.uint8)
+    if image.ndim == 2:
+        return cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+    return image
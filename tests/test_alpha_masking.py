@@ -0,0 +1,51 @@
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+from imagetosvg.config import PipelineConfig
+from imagetosvg.palette import learn_palette
+from imagetosvg.preprocess import preprocess_image
+from imagetosvg.segmentation import TRANSPARENT_LABEL, segment_colors
+from imagetosvg.tracing import trace_layers
+
+
+def _cutout() -> "np.ndarray":
+    image = np.zeros((160, 160, 4), dtype=np.uint8)
+    image[:, :, :3] = (255, 255, 255)
+    cv2.rectangle(image, (60, 50), (119, 109), (40, 160, 30, 255), -1)
+    cv2.circle(image, (90, 80), 12, (20, 20, 220, 255), -1)
+    return image
+
+
+@pytest.mark.parametrize("use_slic", [True, False])
+def test_transparent_pixels_are_not_segmented_or_traced(use_slic: bool) -> None:
+    image = _cutout()
+    config = PipelineConfig(use_slic=use_slic).validated()
+
+    enhanced, edges, detail_map = preprocess_image(image, config)
+    transparent = image[:, :, 3] == 0
+    assert not edges[transparent].any()
+    assert not detail_map[transparent].any()
+
+    segmented = segment_colors(enhanced, config)
+    assert (segmented.labels[transparent] == TRANSPARENT_LABEL).all()
+    assert (segmented.labels[~transparent] >= 0).all()
+
+    trace = trace_layers(segmented, edges, detail_map, config)
+    coords = [int(tok) for layer in trace.layers for d in layer.paths for tok in d.split() if tok.lstrip("-").isdigit()]
+    xs, ys = coords[0::2], coords[1::2]
+    assert min(xs) >= 59 and max(xs) <= 120
+    assert min(ys) >= 49 and max(ys) <= 110
+
+
+def test_shared_palette_ignores_transparent_pixels() -> None:
+    config = PipelineConfig(max_colors_high=2).validated()
+    palette = learn_palette([_cutout()], config)
+
+    assert len(palette.colors_bgr) == 2
+    assert not (palette.colors_bgr > 230).all(axis=1).any()
+
+    transparent = np.zeros((32, 32, 4), dtype=np.uint8)
+    with pytest.raises(ValueError):
+        learn_palette([transparent], config)
@@ -0,0 +1,74 @@
+from pathlib import Path
+
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+from imagetosvg.batch import StagedBatchRunner
+
+
+def _write_images(root: Path, count: int) -> list[Path]:
+    paths = []
+    for idx in range(count):
+        image = np.full((16, 16, 3), idx * 20, dtype=np.uint8)
+        path = root / f"img_{idx}.png"
+        cv2.imwrite(str(path), image)
+        paths.append(path)
+    return paths
+
+
+def test_staged_runner_preserves_order_and_writes_all(tmp_path: Path) -> None:
+    paths = _write_images(tmp_path, 6)
+    written: list[Path] = []
+
+    runner = StagedBatchRunner(
+        lambda path, image: int(image[0, 0, 0]),
+        lambda path, value: written.append(path),
+        prefetch_depth=1,
+        write_queue_depth=1,
+        workers=3,
+    )
+    results = runner.run(paths)
+
+    assert results == [idx * 20 for idx in range(6)]
+    assert sorted(written) == sorted(paths)
+
+
+def test_staged_runner_propagates_errors(tmp_path: Path) -> None:
+    paths = _write_images(tmp_path, 3)
+
+    def process(path: Path, image) -> int:
+        if path.name == "img_1.png":
+            raise RuntimeError("boom")
+        return 0
+
+    runner = StagedBatchRunner(process, lambda path, value: None)
+    with pytest.raises(RuntimeError, match="boom"):
+        runner.run(paths)
+
+
+def test_staged_runner_keeps_none_results_aligned(tmp_path: Path) -> None:
+    paths = _write_images(tmp_path, 4)
+
+    runner = StagedBatchRunner(
+        lambda path, image: None if path.name == "img_1.png" else path.name,
+        lambda path, value: None,
+        workers=2,
+    )
+
+    assert runner.run(paths) == ["img_0.png", None, "img_2.png", "img_3.png"]
+
+
+def test_staged_runner_returns_summaries_and_writes_full_results(tmp_path: Path) -> None:
+    paths = _write_images(tmp_path, 3)
+    written: list[int] = []
+
+    runner = StagedBatchRunner(
+        lambda path, image: image.copy(),
+        lambda path, image: written.append(image.size),
+        summarize=lambda image: int(image[0, 0, 0]),
+    )
+
+    assert runner.run(paths) == [0, 20, 40]
+    assert written == [16 * 16 * 3] * 3
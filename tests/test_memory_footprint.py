@@ -0,0 +1,99 @@
+import os
+import subprocess
+import sys
+from dataclasses import fields
+from pathlib import Path
+
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+from imagetosvg.config import PipelineConfig
+from imagetosvg.io import read_image
+from imagetosvg.segmentation import render_labels, segment_colors
+from imagetosvg.validator import validate_svg_text
+
+
+def _image(h: int = 600, w: int = 800) -> "np.ndarray":
+    rng = np.random.default_rng(5)
+    image = np.zeros((h, w, 3), dtype=np.uint8)
+    for _ in range(30):
+        x, y = rng.integers(0, w), rng.integers(0, h)
+        cv2.circle(image, (int(x), int(y)), int(rng.integers(20, 120)), rng.integers(0, 255, 3).tolist(), -1)
+    return image
+
+
+_RSS_SCRIPT = """
+import sys
+import cv2, numpy as np
+from imagetosvg.config import PipelineConfig
+from imagetosvg.segmentation import segment_colors
+
+rng = np.random.default_rng(5)
+image = np.zeros((600, 800, 3), dtype=np.uint8)
+for _ in range(30):
+    x, y = rng.integers(0, 800), rng.integers(0, 600)
+    cv2.circle(image, (int(x), int(y)), int(rng.integers(20, 120)), rng.integers(0, 255, 3).tolist(), -1)
+config = PipelineConfig(use_slic=False, memory_lean=sys.argv[1] == "lean").validated()
+segment_colors(image[:8, :8].copy(), config)  # warm up lazy imports and allocator pools
+
+
+def peak_kib():
+    # VmHWM belongs to this process image; getrusage's ru_maxrss carries the parent's peak across exec.
+    with open("/proc/self/status") as fh:
+        return next(int(line.split()[1]) for line in fh if line.startswith("VmHWM:"))
+
+
+before = peak_kib()
+segment_colors(image, config)
+print(peak_kib() - before)
+"""
+
+
+def _peak_rss_growth(mode: str) -> int:
+    """Peak resident-set growth (KiB) of one segmentation, measured in a fresh interpreter."""
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+    out = subprocess.run([sys.executable, "-c", _RSS_SCRIPT, mode], env=env, check=True, capture_output=True, text=True)
+    return int(out.stdout.strip())
+
+
+def test_memory_lean_segmentation_lowers_peak_rss_and_compacts_labels() -> None:
+    if not Path("/proc/self/status").exists():
+        pytest.skip("peak RSS is read from /proc")
+    default_peak = _peak_rss_growth("default")
+    lean_peak = _peak_rss_growth("lean")
+    assert lean_peak < default_peak * 0.6
+
+    image = _image()
+    segmented = segment_colors(image, PipelineConfig(use_slic=False, memory_lean=True).validated())
+    assert segmented.labels.dtype == np.int8
+    assert segmented.labels.min() >= 0
+    np.testing.assert_array_equal(segmented.quantized, render_labels(segmented.labels, segmented.palette))
+
+
+def test_segmentation_result_stores_only_labels_and_palette() -> None:
+    image = _image(200, 200)
+    segmented = segment_colors(image, PipelineConfig(use_slic=False, memory_lean=True).validated())
+
+    assert [f.name for f in fields(segmented)] == ["palette", "labels"]
+    assert segmented.labels.nbytes == image.shape[0] * image.shape[1]
+
+
+def test_bmp_inputs_are_memory_mapped(tmp_path: Path) -> None:
+    image = _image(61, 83)  # odd width exercises row padding
+    path = tmp_path / "frame.bmp"
+    assert cv2.imwrite(str(path), image)
+
+    mapped = read_image(path, mmap=True)
+    assert not mapped.flags.writeable
+    np.testing.assert_array_equal(mapped, read_image(path))
+
+
+def test_validation_mse_matches_float_reference() -> None:
+    image = np.full((40, 60, 3), 90, dtype=np.uint8)
+    svg = '<svg xmlns="http://www.w3.org/2000/svg" width="60" height="40"><rect width="60" height="40" fill="rgb(100,100,100)"/></svg>'
+    report = validate_svg_text(image, svg)
+    if report is None:
+        pytest.skip("SVG rendering unavailable")
+    assert report.mse == pytest.approx(100.0, abs=1.0)
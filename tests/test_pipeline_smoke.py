@@ -5,8 +5,13 @@ import pytest
 cv2 = pytest.importorskip("cv2")
 np = pytest.importorskip("numpy")
 
+from imagetosvg.artifacts import PipelineArtifacts
+from imagetosvg.batch import StagedBatchRunner
 from imagetosvg.config import DetailPreset, PipelineConfig
+from imagetosvg.io import read_svg
+from imagetosvg.optimizer import RenderOutcome
 from imagetosvg.pipeline import VectorizationPipeline
+from imagetosvg.validator import validate_similarity
 
 
 def test_pipeline_smoke(tmp_path: Path) -> None:
@@ -24,3 +29,42 @@ def test_pipeline_smoke(tmp_path: Path) -> None:
     assert results[0].output.exists()
     text = results[0].output.read_text(encoding="utf-8")
     assert "<svg" in text and "edge_layer" in text and "detail_layer" in text
+
+
+def test_compressed_output_reads_back(tmp_path: Path) -> None:
+    image = np.zeros((32, 32, 3), dtype=np.uint8)
+    cv2.circle(image, (16, 16), 9, (0, 0, 255), -1)
+    src = tmp_path / "sample.png"
+    cv2.imwrite(str(src), image)
+
+    config = PipelineConfig(output_dir=tmp_path / "out", validate_similarity=False, compress_output=True)
+    output = VectorizationPipeline(config).run(src)[0].output
+
+    assert output.suffix == ".svgz"
+    assert "<svg" in read_svg(output)
+    report = validate_similarity(image, output)  # reads the gzip stream; None when rendering is unavailable
+    assert report is None or report.ssim > 0
+
+
+def test_batch_results_hold_no_svg_text_or_arrays(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    src = tmp_path / "in"
+    src.mkdir()
+    for idx in range(3):
+        image = np.zeros((32, 32, 3), dtype=np.uint8)
+        cv2.circle(image, (16, 16), 6 + idx * 3, (0, 0, 255), -1)
+        cv2.imwrite(str(src / f"img_{idx}.png"), image)
+
+    returned: list = []
+    original_run = StagedBatchRunner.run
+
+    def spy(self, paths):
+        returned.extend(original_run(self, paths))
+        return returned
+
+    monkeypatch.setattr(StagedBatchRunner, "run", spy)
+    config = PipelineConfig(output_dir=tmp_path / "out", validate_similarity=False, save_intermediates=True)
+    results = VectorizationPipeline(config).run(src)
+
+    assert len(returned) == 3 and all(res.output.exists() for res in results)
+    for summary in returned:
+        assert not any(isinstance(value, (str, np.ndarray, RenderOutcome, PipelineArtifacts)) for value in summary)
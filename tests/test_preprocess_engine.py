@@ -0,0 +1,123 @@
+from pathlib import Path
+
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+from imagetosvg.config import DENOISERS, PipelineConfig
+from imagetosvg.optimizer import render_best
+from imagetosvg.pipeline import VectorizationPipeline
+from imagetosvg.preprocess import SHARPEN_KERNEL, PreprocessEngine, _guided_filter
+from imagetosvg.segmentation import segment_colors
+
+
+def _image() -> "np.ndarray":
+    rng = np.random.default_rng(3)
+    image = np.full((96, 128, 3), 110, dtype=np.uint8)
+    cv2.rectangle(image, (20, 20), (70, 70), (40, 70, 150), -1)
+    cv2.circle(image, (95, 50), 18, (50, 130, 60), -1)
+    noise = rng.integers(-15, 16, image.shape)
+    return np.clip(image.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+
+@pytest.mark.parametrize("denoiser", DENOISERS)
+def test_engine_hands_matching_lab_to_segmentation(denoiser: str) -> None:
+    image = _image()
+    config = PipelineConfig(denoiser=denoiser, use_slic=False).validated()
+    result = PreprocessEngine().run(image, config)
+
+    assert result.enhanced.shape == image.shape
+    assert result.edges.shape == result.detail_map.shape == image.shape[:2]
+    assert result.edges.any()
+    # The LAB hand-off matches what segmentation would compute itself, up to rounding,
+    # wherever sharpening did not push the color out of the sRGB gamut.
+    relab = cv2.cvtColor(result.enhanced, cv2.COLOR_BGR2LAB)
+    in_gamut = ((result.enhanced > 0) & (result.enhanced < 255)).all(axis=2)
+    assert in_gamut.mean() > 0.3
+    assert np.abs(relab.astype(np.int16) - result.lab)[in_gamut].max() <= 3
+
+    segmented = segment_colors(result.enhanced, config, lab=result.lab)
+    assert segmented.labels.min() >= 0
+    assert len(segmented.palette) >= 2
+
+
+def test_engine_reuses_base_stage_across_edge_settings() -> None:
+    image = _image()
+    engine = PreprocessEngine()
+    first = engine.run(image, PipelineConfig(canny_low=40, canny_high=120).validated())
+    second = engine.run(image, PipelineConfig(canny_low=80, canny_high=200).validated())
+
+    assert second.enhanced is first.enhanced
+    assert "denoise" not in second.timings
+    assert second.edges.sum() <= first.edges.sum()
+
+    third = engine.run(image, PipelineConfig(denoiser="guided").validated())
+    assert third.enhanced is not first.enhanced
+
+
+def test_unknown_denoiser_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        PipelineConfig(denoiser="median").validated()
+
+
+def test_default_denoiser_matches_original_preprocessing() -> None:
+    image = _image()
+    config = PipelineConfig().validated()
+    result = PreprocessEngine().run(image, config)
+
+    sigma = float(config.denoise_sigma)
+    denoised = cv2.bilateralFilter(image, d=9, sigmaColor=sigma, sigmaSpace=sigma)
+    l, a, b = cv2.split(cv2.cvtColor(denoised, cv2.COLOR_BGR2LAB))
+    l_norm = cv2.createCLAHE(clipLimit=2.4, tileGridSize=(8, 8)).apply(l)
+    expected = cv2.filter2D(cv2.cvtColor(cv2.merge([l_norm, a, b]), cv2.COLOR_LAB2BGR), -1, SHARPEN_KERNEL)
+
+    np.testing.assert_array_equal(result.enhanced, expected)
+    np.testing.assert_array_equal(result.lab, cv2.cvtColor(expected, cv2.COLOR_BGR2LAB))
+
+
+def test_guided_denoiser_clamps_undershoot_to_zero() -> None:
+    rng = np.random.default_rng(0)
+    image = np.zeros((64, 64, 3), dtype=np.uint8)
+    image[:, 32:] = 200
+    image = np.clip(image + rng.normal(0, 40, image.shape), 0, 255).astype(np.uint8)
+    config = PipelineConfig(denoiser="guided", denoise_sigma=10.0).validated()
+
+    src = image.astype(np.float32) / 255.0
+    filtered = _guided_filter(cv2.cvtColor(src, cv2.COLOR_BGR2GRAY), src, 4, (10.0 / 255.0) ** 2, subsample=2)
+    assert (filtered < 0).any()
+
+    denoised = PreprocessEngine().denoise(image, config)
+    expected = np.clip(np.rint(filtered * 255.0), 0, 255).astype(np.uint8)
+    assert np.abs(denoised.astype(np.int16) - expected).max() <= 1
+    assert (denoised[filtered < 0] == 0).all()
+
+
+def test_render_best_reuses_engine_buffers_and_drops_its_cache() -> None:
+    engine = PreprocessEngine()
+    config = PipelineConfig(use_slic=False, validate_similarity=False).validated()
+    render_best(_image(), Path("a.png"), config, engine=engine)
+    buffer = engine._buffers["denoised"]
+
+    image = _image()[::-1].copy()
+    render_best(image, Path("b.png"), config, engine=engine)
+
+    assert engine._buffers["denoised"] is buffer
+    assert "denoise" in engine.run(image, config).timings
+
+
+def test_batch_creates_one_engine_per_worker(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    for idx in range(3):
+        cv2.imwrite(str(tmp_path / f"img_{idx}.png"), _image())
+    created: list[PreprocessEngine] = []
+    original_init = PreprocessEngine.__init__
+
+    def counting_init(self) -> None:
+        original_init(self)
+        created.append(self)
+
+    monkeypatch.setattr(PreprocessEngine, "__init__", counting_init)
+    config = PipelineConfig(output_dir=tmp_path / "out", validate_similarity=False, compute_workers=1)
+    VectorizationPipeline(config).run(tmp_path)
+
+    assert len(created) == 1
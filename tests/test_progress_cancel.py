@@ -0,0 +1,53 @@
+from pathlib import Path
+
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+from imagetosvg.config import PipelineConfig
+from imagetosvg.optimizer import render_best
+from imagetosvg.pipeline import VectorizationPipeline
+
+
+class Cancelled(Exception):
+    pass
+
+
+def _image() -> "np.ndarray":
+    image = np.zeros((48, 48, 3), dtype=np.uint8)
+    cv2.circle(image, (24, 24), 14, (0, 180, 255), -1)
+    return image
+
+
+def test_render_best_reports_stages_in_order() -> None:
+    stages: list[str] = []
+    outcome = render_best(_image(), Path("sample.png"), PipelineConfig(validate_similarity=False), progress=stages.append)
+
+    assert outcome.svg_text
+    assert stages == [
+        "candidate 1/1: preprocessing",
+        "candidate 1/1: segmenting",
+        "candidate 1/1: tracing",
+        "candidate 1/1: building SVG",
+    ]
+
+
+def test_raising_progress_cancels_batch_without_output(tmp_path: Path) -> None:
+    for name in ("a.png", "b.png"):
+        cv2.imwrite(str(tmp_path / name), _image())
+    out_dir = tmp_path / "out"
+    stages: list[str] = []
+
+    def on_progress(stage: str) -> None:
+        stages.append(stage)
+        if stage.endswith("tracing"):
+            raise Cancelled()
+
+    config = PipelineConfig(output_dir=out_dir, validate_similarity=False, save_intermediates=True)
+    with pytest.raises(Cancelled):
+        VectorizationPipeline(config).run(tmp_path, progress=on_progress)
+
+    assert stages[-1].endswith("tracing")
+    assert not any(stage.endswith("building SVG") for stage in stages)
+    assert not list(out_dir.glob("*.svg")) and not list(out_dir.glob("*.npz"))
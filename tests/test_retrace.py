@@ -0,0 +1,72 @@
+from pathlib import Path
+
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+from imagetosvg.artifacts import artifact_path_for, load_artifacts
+from imagetosvg.config import DetailPreset, PipelineConfig
+from imagetosvg.pipeline import VectorizationPipeline
+
+
+def test_retrace_from_saved_intermediates(tmp_path: Path) -> None:
+    image = np.zeros((64, 64, 3), dtype=np.uint8)
+    cv2.rectangle(image, (5, 5), (58, 58), (255, 0, 0), -1)
+    cv2.circle(image, (32, 32), 12, (0, 200, 255), -1)
+
+    src = tmp_path / "sample.png"
+    cv2.imwrite(str(src), image)
+
+    config = PipelineConfig(
+        detail=DetailPreset.HIGH,
+        output_dir=tmp_path / "out",
+        validate_similarity=False,
+        save_intermediates=True,
+    )
+    result = VectorizationPipeline(config).run(src)[0]
+
+    artifact_path = artifact_path_for(result.output)
+    assert artifact_path.exists()
+    artifacts = load_artifacts(artifact_path)
+    assert artifacts.size == (64, 64)
+    assert artifacts.segmented.labels.shape == (64, 64)
+
+    retrace_config = PipelineConfig(
+        output_dir=tmp_path / "retraced",
+        validate_similarity=False,
+        include_edge_layer=False,
+        include_detail_layer=False,
+    )
+    retraced = VectorizationPipeline(retrace_config).retrace(artifact_path)
+
+    assert retraced.output == tmp_path / "retraced" / "sample.svg"
+    text = retraced.output.read_text(encoding="utf-8")
+    assert "color_" in text
+    assert "edge_layer" not in text and "detail_layer" not in text
+
+
+def test_retrace_defaults_to_recorded_preset(tmp_path: Path) -> None:
+    image = np.zeros((64, 64, 3), dtype=np.uint8)
+    cv2.circle(image, (32, 32), 20, (40, 180, 90), -1)
+    src = tmp_path / "sample.png"
+    cv2.imwrite(str(src), image)
+
+    config = PipelineConfig(
+        detail=DetailPreset.ULTRA,
+        output_dir=tmp_path / "out",
+        validate_similarity=False,
+        save_intermediates=True,
+    )
+    result = VectorizationPipeline(config).run(src)[0]
+    artifacts = load_artifacts(artifact_path_for(result.output))
+    assert artifacts.detail == DetailPreset.ULTRA
+    assert artifacts.simplification == pytest.approx(config.simplification_ultra)
+
+    retrace_config = PipelineConfig(output_dir=tmp_path / "retraced", validate_similarity=False)
+    pipeline = VectorizationPipeline(retrace_config)
+    retraced = pipeline.retrace(artifact_path_for(result.output))
+    assert "detail=ultra" in retraced.output.read_text(encoding="utf-8")
+
+    overridden = pipeline.retrace(artifact_path_for(result.output), use_recorded_detail=False)
+    assert "detail=high" in overridden.output.read_text(encoding="utf-8")
@@ -0,0 +1,99 @@
+from pathlib import Path
+
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+
+from imagetosvg.config import DetailPreset, PipelineConfig
+from imagetosvg.pipeline import VectorizationPipeline
+from imagetosvg.scheduler import (
+    DEFAULT_EDGE_DENSITY,
+    CostModel,
+    ImageCostFeatures,
+    estimate_features,
+    measure_features,
+    schedule_longest_first,
+)
+
+
+def test_schedule_orders_largest_and_busiest_first(tmp_path: Path) -> None:
+    small = np.zeros((64, 64, 3), dtype=np.uint8)
+    large_flat = np.zeros((512, 512, 3), dtype=np.uint8)
+    large_busy = np.zeros((512, 512, 3), dtype=np.uint8)
+    for y in range(0, 512, 64):
+        large_busy[y : y + 32] = 255
+
+    paths = []
+    for name, image in (("a_small", small), ("b_flat", large_flat), ("c_busy", large_busy)):
+        path = tmp_path / f"{name}.jpg"
+        cv2.imwrite(str(path), image)
+        paths.append(path)
+
+    schedule = schedule_longest_first(paths, PipelineConfig(), CostModel())
+    assert [item.path.stem for item in schedule] == ["c_busy", "b_flat", "a_small"]
+
+
+def test_png_features_come_from_the_header(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    path = tmp_path / "large.png"
+    cv2.imwrite(str(path), np.zeros((300, 400, 3), dtype=np.uint8))
+
+    def no_decode(*args, **kwargs):
+        raise AssertionError("scheduling must not decode PNG pixels")
+
+    monkeypatch.setattr(cv2, "imread", no_decode)
+    monkeypatch.setattr(Image.Image, "load", no_decode)
+    features = estimate_features(path, PipelineConfig())
+    assert features.megapixels == pytest.approx(0.12)
+    assert features.edge_density == DEFAULT_EDGE_DENSITY
+
+
+def test_measured_features_match_decoded_image() -> None:
+    image = np.zeros((256, 256, 4), dtype=np.uint8)
+    for y in range(0, 256, 64):
+        image[y : y + 32] = 255
+    features = measure_features(image, PipelineConfig())
+    assert features.megapixels == pytest.approx(256 * 256 / 1e6)
+    assert features.edge_density > 0.0
+
+
+def test_cost_model_refits_and_round_trips(tmp_path: Path) -> None:
+    config = PipelineConfig(detail=DetailPreset.LOW, auto_iterate=False)
+    model = CostModel()
+    for mpx, density in ((0.5, 0.1), (1.0, 0.2), (2.0, 0.05), (4.0, 0.3)):
+        model.observe(ImageCostFeatures(mpx, density), config, 2.0 * mpx + 0.5)
+    model.refit()
+
+    path = tmp_path / "costs.json"
+    model.save(path)
+    loaded = CostModel.load(path)
+
+    predicted = loaded.predict(ImageCostFeatures(3.0, 0.1), config)
+    assert predicted == pytest.approx(6.5, rel=1e-3)
+
+
+@pytest.mark.parametrize("payload", ["[]", '{"coefficients": {"low": [1.0, 2.0]}}', '{"observations": {"low": 3}}'])
+def test_malformed_cost_model_falls_back_to_defaults(tmp_path: Path, payload: str) -> None:
+    path = tmp_path / "costs.json"
+    path.write_text(payload, encoding="utf-8")
+
+    model = CostModel.load(path)
+
+    assert model.coefficients == CostModel().coefficients
+    assert model.predict(ImageCostFeatures(1.0, 0.1), PipelineConfig()) > 0.0
+
+
+def test_scheduled_batch_reports_in_input_order(tmp_path: Path) -> None:
+    src = tmp_path / "in"
+    src.mkdir()
+    for name, size in (("a", 32), ("b", 96), ("c", 64)):
+        image = np.zeros((size, size, 3), dtype=np.uint8)
+        cv2.circle(image, (size // 2, size // 2), size // 3, (0, 200, 255), -1)
+        cv2.imwrite(str(src / f"{name}.jpg"), image)
+
+    config = PipelineConfig(output_dir=tmp_path / "out", validate_similarity=False, schedule_batch=True)
+    results = VectorizationPipeline(config).run(src)
+
+    assert [res.source.stem for res in results] == ["a", "b", "c"]
+    assert results[1].predicted_seconds > results[0].predicted_seconds
@@ -0,0 +1,66 @@
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+from imagetosvg.config import PipelineConfig
+from imagetosvg.palette import SharedPalette
+from imagetosvg.sequence import SequenceVectorizer, changed_blocks
+
+
+def _frame(ball_x: int) -> "np.ndarray":
+    image = np.full((128, 192, 3), 235, dtype=np.uint8)
+    cv2.rectangle(image, (8, 8), (56, 56), (30, 30, 200), -1)
+    cv2.circle(image, (ball_x, 96), 14, (200, 60, 20), -1)
+    return image
+
+
+def test_changed_blocks_flags_only_moving_tiles() -> None:
+    grid = changed_blocks(_frame(100), _frame(116), block=32, threshold=3.0)
+    assert grid.shape == (4, 6)
+    assert grid[2:, 2:5].any()
+    assert not grid[:2, :2].any()
+
+
+def test_sequence_reuses_palette_and_unchanged_layers() -> None:
+    vectorizer = SequenceVectorizer(PipelineConfig(validate_similarity=False).validated())
+
+    first, stats = vectorizer.process(_frame(100))
+    assert stats.changed_fraction == 1.0
+    palette = vectorizer.palette
+
+    same, stats = vectorizer.process(_frame(100))
+    assert same is first and stats.changed_fraction == 0.0
+
+    moved, stats = vectorizer.process(_frame(116))
+    assert vectorizer.palette is palette
+    assert stats.reused_layers >= 1
+    square = {layer.label: layer for layer in first.layers if layer.label is not None}
+    assert any(layer is square.get(layer.label) for layer in moved.layers)
+
+
+def _gradient_frame(ball_x: int, channels: int, size: tuple[int, int] = (256, 256)) -> "np.ndarray":
+    yy, xx = np.mgrid[0 : size[0], 0 : size[1]]
+    image = np.dstack([xx * 0.6 + 40, yy * 0.5 + 60, (xx + yy) * 0.3 + 30]).astype(np.uint8)
+    cv2.rectangle(image, (20, 20), (80, 70), (200, 200, 40), -1)
+    cv2.circle(image, (ball_x, 150), 24, (30, 40, 220), -1)
+    return cv2.cvtColor(image, cv2.COLOR_BGR2BGRA) if channels == 4 else image
+
+
+@pytest.mark.parametrize("denoiser", ["bilateral", "guided", "bilateral_lowres"])
+@pytest.mark.parametrize("channels", [3, 4])
+@pytest.mark.parametrize("size", [(256, 256), (257, 255), (333, 201)])
+def test_incremental_frame_matches_full_recompute(denoiser: str, channels: int, size: tuple[int, int]) -> None:
+    config = PipelineConfig(validate_similarity=False, use_slic=False, denoiser=denoiser).validated()
+    colors = np.array([[60, 80, 50], [120, 140, 110], [200, 190, 170], [200, 200, 40], [30, 40, 220]], dtype=np.uint8)
+    incremental = SequenceVectorizer(config, palette=SharedPalette.from_bgr(colors))
+    incremental.process(_gradient_frame(100, channels, size))
+    incremental.process(_gradient_frame(130, channels, size))
+
+    full = SequenceVectorizer(config, palette=incremental.palette)
+    full.process(_gradient_frame(130, channels, size))
+
+    a, b = incremental._state, full._state
+    np.testing.assert_array_equal(a.enhanced, b.enhanced)
+    np.testing.assert_array_equal(a.edges, b.edges)
+    assert (a.labels == b.labels).mean() > 0.999
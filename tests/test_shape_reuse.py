@@ -0,0 +1,55 @@
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("svgwrite")
+
+from imagetosvg.config import PipelineConfig
+from imagetosvg.svg_builder import build_svg, build_svg_with_reuse, plan_shape_reuse
+from imagetosvg.tracing import PathLayer, TraceResult
+
+
+def _square(x: int, y: int) -> str:
+    return f"M {x} {y} L {x + 4} {y} L {x + 4} {y + 4} L {x} {y + 4} Z"
+
+
+def test_repeated_paths_become_symbol_uses() -> None:
+    trace = TraceResult(
+        layers=[
+            PathLayer(name="color_000", paths=[_square(0, 0), _square(10, 20), "M 0 0 L 9 0 L 0 9 Z"], fill="rgb(1,2,3)"),
+            PathLayer(name="edge_layer", paths=[_square(30, 5)], fill="none", stroke="rgb(24,24,24)", stroke_width=0.35),
+        ]
+    )
+
+    plan = plan_shape_reuse(trace)
+    assert list(plan.symbols.values()) == ["M 0 0 L 4 0 L 4 4 L 0 4 Z"]
+    assert plan.placements[(0, 1)] == ("shape_0000", 10.0, 20.0)
+    assert (0, 2) not in plan.placements
+    assert plan.paths_replaced == 3
+
+    config = PipelineConfig(dedupe_shapes=True, embed_metadata=False)
+    text = build_svg(trace, (64, 64), config, source=Path("tile.png"))
+    assert text.count("<symbol") == 1
+    assert text.count("<use") == 3
+    assert 'x="10" xlink:href="#shape_0000" y="20"' in text
+    assert "M 0 0 L 9 0 L 0 9 Z" in text
+
+
+def test_bytes_saved_matches_serialized_size() -> None:
+    trace = TraceResult(layers=[PathLayer(name="color_000", paths=[_square(5 * i, 3 * i) for i in range(4)], fill="rgb(1,2,3)")])
+    plain = build_svg(trace, (64, 64), PipelineConfig(embed_metadata=False), source=Path("tile.png"))
+    text, plan = build_svg_with_reuse(trace, (64, 64), PipelineConfig(dedupe_shapes=True, embed_metadata=False), Path("tile.png"))
+
+    assert plan.paths_replaced == 4
+    assert plan.bytes_saved == len(plain) - len(text) > 0
+
+
+def test_shapes_are_not_deduplicated_when_it_grows_the_file() -> None:
+    trace = TraceResult(
+        layers=[PathLayer(name="color_000", paths=["M 0 0 L 4 0 L 0 4 Z", "M 10 10 L 14 10 L 10 14 Z"], fill="rgb(1,2,3)")]
+    )
+    assert plan_shape_reuse(trace).symbols == {}
+
+    plain = build_svg(trace, (64, 64), PipelineConfig(embed_metadata=False), source=Path("tile.png"))
+    deduped = build_svg(trace, (64, 64), PipelineConfig(dedupe_shapes=True, embed_metadata=False), Path("tile.png"))
+    assert deduped == plain
@@ -0,0 +1,29 @@
+from pathlib import Path
+
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+np = pytest.importorskip("numpy")
+
+from imagetosvg.config import PipelineConfig
+from imagetosvg.palette import SharedPalette, load_palette, save_palette
+from imagetosvg.segmentation import segment_colors
+
+
+def test_shared_palette_lookup_and_segmentation(tmp_path: Path) -> None:
+    colors = np.array([[0, 0, 255], [0, 255, 0], [255, 0, 0]], dtype=np.uint8)
+    palette = SharedPalette.from_bgr(colors)
+
+    image = np.zeros((120, 180, 3), dtype=np.uint8)
+    image[:, :60] = (10, 10, 240)
+    image[:, 60:120] = (5, 245, 12)
+    image[:, 120:] = (250, 3, 8)
+
+    for use_slic in (False, True):
+        result = segment_colors(image, PipelineConfig(use_slic=use_slic).validated(), palette=palette)
+        assert result.labels[60, 30] == 0 and result.labels[60, 90] == 1 and result.labels[60, 150] == 2
+        assert np.array_equal(result.palette, colors)
+
+    path = tmp_path / "brand.json"
+    save_palette(path, palette)
+    assert np.array_equal(load_palette(path).colors_bgr, colors)